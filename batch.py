@@ -0,0 +1,267 @@
+"""
+Batch runner for many dataset exports
+Pipelines loading, analysis and chart rendering across datasets with asyncio:
+bounded queues between the stages give backpressure, sources are parsed into
+the columnar clean cache in threads and the CPU stages run in a process pool.
+Every dataset writes to its own output directory.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fileutil import file_hash
+from cleaning import build_cache
+from data_analysis import ANALYSIS_STAGES, DataAnalyzer
+from instrumentation import TRACER
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stage -> Chrome trace thread id base, so each stage gets its own rows
+STAGE_TRACKS = {'load': 100, 'analyze': 200, 'render': 300}
+
+def make_jobs(entries, output_root='reports', output_format='csv', charts=None):
+    """Build one job per entry, each with its own output directory
+
+    An entry is a dataset path or a dict with a ``dataset`` and optional
+    ``output_dir``, ``output_format``, ``charts`` and ``render`` overrides.
+    Directories default to ``output_root/<dataset name>``; repeated names
+    get a numeric suffix, skipping directories claimed explicitly. Raises
+    ValueError if two jobs would still share an output directory.
+    """
+    entries = [{'dataset': entry} if isinstance(entry, str) else dict(entry) for entry in entries]
+    used = {os.path.abspath(entry['output_dir']) for entry in entries if 'output_dir' in entry}
+    jobs = []
+    for entry in entries:
+        job = {'output_format': output_format, 'charts': charts, 'render': True}
+        job.update(entry)
+        if 'output_dir' not in entry:
+            name = os.path.splitext(os.path.basename(entry['dataset']))[0]
+            candidate, n = os.path.join(output_root, name), 1
+            while os.path.abspath(candidate) in used:
+                n += 1
+                candidate = os.path.join(output_root, f"{name}-{n}")
+            used.add(os.path.abspath(candidate))
+            job['output_dir'] = candidate
+        jobs.append(job)
+
+    directories = [os.path.abspath(job['output_dir']) for job in jobs]
+    duplicates = sorted({d for d in directories if directories.count(d) > 1})
+    if duplicates:
+        raise ValueError(f"Several jobs write to the same output directory: {', '.join(duplicates)}")
+    return jobs
+
+def read_config(config_path):
+    """Read a JSON list of dataset paths or job objects (see ``make_jobs``)"""
+    with open(config_path) as f:
+        return json.load(f)
+
+def load_dataset(job):
+    """Load stage (thread): hash the source and stage it in the clean cache
+
+    Unless a cleaned copy of the same bytes is already cached, the source is
+    parsed, cleaned and written to the Parquet clean cache, so the workers
+    read typed columns instead of parsing the source again. Returns the
+    SHA-256, which the later stages receive through the job instead of
+    hashing the file themselves, and whether the cache was already there.
+    """
+    if not os.path.exists(job['dataset']):
+        raise FileNotFoundError(f"Dataset not found: {job['dataset']}")
+    digest = file_hash(job['dataset'])
+    _, cached = build_cache(job['dataset'], source_hash=digest)
+    return digest, cached
+
+def analyze_dataset(job):
+    """Analysis stage (worker process): analyze and save one dataset
+
+    The worker reads the cleaned frame the load stage cached rather than
+    having it shipped from the parent. The printed report goes to
+    ``analysis.txt`` in the dataset's output directory. Returns the number
+    of rows analyzed.
+    """
+    analyzer = DataAnalyzer(job['dataset'], job['output_format'], output_dir=job['output_dir'])
+    os.makedirs(job['output_dir'], exist_ok=True)
+    with open(os.path.join(job['output_dir'], 'analysis.txt'), 'w') as report, \
+            contextlib.redirect_stdout(report):
+        if not analyzer.load_data(source_hash=job.get('source_hash')):
+            raise FileNotFoundError(f"Dataset not found: {job['dataset']}")
+        for stage in ANALYSIS_STAGES:
+            getattr(analyzer, stage)()
+    return len(analyzer.df)
+
+def render_dataset(job):
+    """Render stage (worker process): draw one dataset's charts into ``<output_dir>/charts``
+
+    Reads the cleaned frame the load stage cached, and draws in this
+    process rather than starting a nested pool.
+    """
+    from data_visualization import DataVisualizer
+
+    visualizer = DataVisualizer(job['dataset'])
+    with open(os.path.join(job['output_dir'], 'render.txt'), 'w') as report, \
+            contextlib.redirect_stdout(report):
+        if not visualizer.load_data(source_hash=job.get('source_hash')):
+            raise FileNotFoundError(f"Dataset not found: {job['dataset']}")
+        visualizer.render_all(os.path.join(job['output_dir'], 'charts'), workers=1, charts=job.get('charts'))
+
+class BatchRunner:
+    """Bounded three-stage pipeline (load -> analyze -> render) over many datasets
+
+    ``loaders`` sources are staged concurrently in threads; analysis and
+    rendering share a pool of ``workers`` processes. Only job numbers pass
+    between stages, never frames: workers read the clean cache themselves.
+    A queue of at most ``queue_size`` jobs sits between
+    consecutive stages, so a slow stage stalls the one before it instead of
+    letting read-ahead run unbounded. A failing dataset is recorded and the
+    others go on.
+    """
+
+    def __init__(self, jobs, loaders=2, workers=None, queue_size=2):
+        # Copies: the load stage records each source's hash in its job
+        self.jobs = [dict(job) for job in jobs]
+        self.loaders = loaders
+        self.workers = workers or os.cpu_count()
+        self.queue_size = queue_size
+        self.results = []
+
+    async def _stage(self, stage, slot, i, awaitable):
+        """Await one stage of job ``i``, recording its duration and span"""
+        job, result = self.jobs[i], self.results[i]
+        start = time.time()
+        perf_start = time.perf_counter()
+        try:
+            value = await awaitable
+        except Exception as e:
+            result.update(status='failed', failed_stage=stage, error=f"{type(e).__name__}: {e}")
+            logger.error("%s failed during %s: %s", job['dataset'], stage, e)
+            return None, False
+        duration = time.perf_counter() - perf_start
+        result[f"{stage}_s"] = round(duration, 3)
+        TRACER.add(f"batch.{stage}", start, duration, tid=STAGE_TRACKS[stage] + slot, dataset=job['dataset'])
+        logger.info("%s: %s finished in %.3fs", job['dataset'], stage, duration)
+        return value, True
+
+    async def _load_worker(self, slot, pending, loaded):
+        while not pending.empty():
+            i = pending.get_nowait()
+            staged, ok = await self._stage('load', slot, i, asyncio.to_thread(load_dataset, self.jobs[i]))
+            if ok:
+                self.jobs[i]['source_hash'], self.results[i]['cached'] = staged
+                # Blocks while the analysis stage is behind
+                await loaded.put(i)
+
+    async def _analyze_worker(self, slot, pool, loaded, analyzed):
+        loop = asyncio.get_running_loop()
+        while (i := await loaded.get()) is not None:
+            rows, ok = await self._stage('analyze', slot, i,
+                                         loop.run_in_executor(pool, analyze_dataset, self.jobs[i]))
+            if not ok:
+                continue
+            self.results[i]['rows'] = rows
+            if self.jobs[i].get('render', True):
+                await analyzed.put(i)
+            else:
+                self.results[i]['status'] = 'done'
+
+    async def _render_worker(self, slot, pool, analyzed):
+        loop = asyncio.get_running_loop()
+        while (i := await analyzed.get()) is not None:
+            _, ok = await self._stage('render', slot, i,
+                                      loop.run_in_executor(pool, render_dataset, self.jobs[i]))
+            if ok:
+                self.results[i]['status'] = 'done'
+
+    async def run(self):
+        """Run every job through the pipeline and return the per-dataset results, in job order"""
+        self.results = [{'dataset': job['dataset'], 'output_dir': job['output_dir'], 'status': 'pending'}
+                        for job in self.jobs]
+        pending = asyncio.Queue()
+        for i in range(len(self.jobs)):
+            pending.put_nowait(i)
+        loaded = asyncio.Queue(maxsize=self.queue_size)
+        analyzed = asyncio.Queue(maxsize=self.queue_size)
+
+        # Spawned workers: forking while loader threads run is unsafe
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            loaders = [asyncio.create_task(self._load_worker(i, pending, loaded)) for i in range(self.loaders)]
+            analyzers = [asyncio.create_task(self._analyze_worker(i, pool, loaded, analyzed))
+                         for i in range(self.workers)]
+            renderers = [asyncio.create_task(self._render_worker(i, pool, analyzed)) for i in range(self.workers)]
+
+            await asyncio.gather(*loaders)
+            for _ in analyzers:
+                await loaded.put(None)
+            await asyncio.gather(*analyzers)
+            for _ in renderers:
+                await analyzed.put(None)
+            await asyncio.gather(*renderers)
+        return self.results
+
+def run_batch(jobs, loaders=2, workers=None, queue_size=2, summary_path=None):
+    """Run the batch pipeline and optionally write the results as JSON"""
+    start = time.perf_counter()
+    results = asyncio.run(BatchRunner(jobs, loaders, workers, queue_size).run())
+    elapsed = time.perf_counter() - start
+
+    print(f"{'dataset':<40} {'status':<8} {'rows':>10} {'load s':>8} {'analyze s':>10} {'render s':>9}  output")
+    for r in results:
+        print(f"{r['dataset']:<40} {r['status']:<8} {r.get('rows', ''):>10} {r.get('load_s', ''):>8} "
+              f"{r.get('analyze_s', ''):>10} {r.get('render_s', ''):>9}  {r['output_dir']}")
+        if 'error' in r:
+            print(f"  {r['failed_stage']} failed: {r['error']}")
+    print(f"Processed {len(results)} datasets in {elapsed:.3f}s wall time")
+
+    if summary_path is not None:
+        directory = os.path.dirname(summary_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(summary_path, 'w') as f:
+            json.dump({'wall_s': elapsed, 'results': results}, f, indent=2)
+    return results
+
+def main(argv=None, prog=None):
+    """Run from command-line arguments; ``prog`` names the command in help output"""
+    import argparse
+    from data_visualization import CHART_FILES
+    from instrumentation import add_arguments, session
+
+    parser = argparse.ArgumentParser(prog=prog, description="Analyze and render many Netflix datasets")
+    parser.add_argument('datasets', nargs='*', help="dataset paths (.csv, .parquet or .feather)")
+    parser.add_argument('--config', help="JSON list of dataset paths or job objects")
+    parser.add_argument('--output-root', default='reports', help="parent of the per-dataset output directories")
+    parser.add_argument('--output-format', default='csv', choices=['csv', 'parquet', 'feather'],
+                        help="format of the processed output files")
+    parser.add_argument('--charts', nargs='+', choices=list(CHART_FILES), help="charts to render (default: all)")
+    parser.add_argument('--no-render', action='store_true', help="skip the render stage")
+    parser.add_argument('--loaders', type=int, default=2, help="datasets read concurrently")
+    parser.add_argument('--workers', type=int, help="processes for analysis and rendering (default: CPU count)")
+    parser.add_argument('--queue-size', type=int, default=2,
+                        help="datasets that may wait between two stages before the earlier stage pauses")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    entries = list(args.datasets)
+    if args.config:
+        entries += read_config(args.config)
+    if not entries:
+        parser.error("no datasets given; pass dataset paths or --config")
+    try:
+        jobs = make_jobs(entries, args.output_root, args.output_format, args.charts)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.no_render:
+        for job in jobs:
+            job['render'] = False
+
+    with session(args.trace, args.trace_format, args.profile, args.log_format, args.log_level):
+        results = run_batch(jobs, args.loaders, args.workers, args.queue_size,
+                            os.path.join(args.output_root, 'batch_summary.json'))
+    return 1 if any(r['status'] != 'done' for r in results) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,204 @@
+"""
+Benchmark suite for the analysis and visualization pipeline
+Times every DataAnalyzer and DataVisualizer stage across dataset sizes and
+compares result files against a baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import multiprocessing
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+def _reset_peak_rss():
+    """Reset the kernel's peak RSS (VmHWM) for this process; False where unsupported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _proc_status_kb(field):
+    """Return a memory field of /proc/self/status such as VmRSS or VmHWM, in KB"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    return None
+
+def _measure(stage, func, trace_alloc):
+    """Run one stage and return its measurements
+
+    Where the kernel can reset the peak RSS (Linux, ``peak_rss_scope``
+    'stage'), ``peak_rss_kb`` is the peak during the stage and
+    ``peak_rss_growth_kb`` how far it rose above the RSS at the start.
+    Elsewhere (scope 'process') they are the process-wide ``ru_maxrss``
+    and how far the stage raised it.
+    """
+    if trace_alloc:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+    per_stage = _reset_peak_rss()
+    rss_before = _proc_status_kb('VmRSS') if per_stage else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    wall = time.perf_counter() - start
+    peak = _proc_status_kb('VmHWM') if per_stage else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    result = {
+        'stage': stage,
+        'wall_s': wall,
+        'peak_rss_kb': peak,
+        'peak_rss_scope': 'stage' if per_stage else 'process',
+        'peak_rss_growth_kb': peak - rss_before,
+    }
+    if trace_alloc:
+        after = tracemalloc.take_snapshot()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['alloc_peak_bytes'] = alloc_peak
+        # Blocks allocated during the stage and still alive at its end, not a
+        # count of every allocation (freed temporaries cancel out)
+        result['alloc_net_blocks'] = sum(stat.count_diff for stat in after.compare_to(before, 'filename')
+                                         if stat.count_diff > 0)
+    return result
+
+def benchmark_size(n_rows, seed=0, trace_alloc=True):
+    """Benchmark every stage on a generated dataset of ``n_rows`` rows
+
+    Runs in its own process so peak RSS reflects this dataset size only.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from create_sample_data import create_large_netflix_data
+    from data_analysis import ANALYSIS_STAGES, DataAnalyzer
+    from data_visualization import CHART_FILES, DataVisualizer
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='netflix-bench-') as workdir:
+        os.chdir(workdir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_large_netflix_data(n_rows, seed=seed, output_path='netflix_titles.csv')
+
+        analyzer = DataAnalyzer('netflix_titles.csv')
+        # The same stage lists run_analysis and render_all use, so new stages are covered.
+        # The token index and query plan are built lazily by the first stage that
+        # needs them, so they are timed on their own right after cleaning.
+        names = ['load_data'] + ANALYSIS_STAGES
+        after_cleaning = names.index('data_cleaning') + 1
+        names[after_cleaning:after_cleaning] = ['token_index', 'plan_results']
+        stages = {name: getattr(analyzer, name) for name in names}
+        # Measure a real cleaning pass rather than a cache hit
+        stages['load_data'] = lambda: analyzer.load_data(use_cache=False)
+        for name, func in stages.items():
+            results.append(dict(_measure(f"DataAnalyzer.{name}", func, trace_alloc), size=n_rows))
+
+        visualizer = DataVisualizer('netflix_titles.csv')
+        for name in ['load_data'] + list(CHART_FILES):
+            func = getattr(visualizer, name)
+            results.append(dict(_measure(f"DataVisualizer.{name}", func, trace_alloc), size=n_rows))
+            plt.close('all')
+    return results
+
+def run(sizes, output, seed=0, trace_alloc=True):
+    """Benchmark each size in a fresh process and write the results as JSON"""
+    import numpy as np
+    import pandas as pd
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for n_rows in sizes:
+        print(f"Benchmarking {n_rows:,} rows...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            size_results = pool.submit(benchmark_size, n_rows, seed, trace_alloc).result()
+        for r in size_results:
+            print(f"  {r['stage']:<35} {r['wall_s']:>9.3f}s  peak RSS {r['peak_rss_kb'] / 1024:>8.1f} MB "
+                  f"(+{r['peak_rss_growth_kb'] / 1024:.1f} MB)")
+        results.extend(size_results)
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'seed': seed,
+            'trace_alloc': trace_alloc,
+        },
+        'results': results,
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+    return report
+
+def compare(baseline_path, candidate_path, threshold=0.10, min_delta=0.005):
+    """Print per-stage changes between two result files
+
+    Returns the (size, stage) pairs whose wall time grew by more than
+    ``threshold`` (relative) and ``min_delta`` seconds (absolute).
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['size'], r['stage']): r for r in json.load(f)['results']}
+    with open(candidate_path) as f:
+        candidate = {(r['size'], r['stage']): r for r in json.load(f)['results']}
+
+    regressions = []
+    print(f"{'size':>10}  {'stage':<35} {'base s':>9} {'new s':>9} {'change':>8}  {'RSS MB':>15}")
+    for key in sorted(set(baseline) & set(candidate)):
+        base, new = baseline[key], candidate[key]
+        change = (new['wall_s'] - base['wall_s']) / base['wall_s'] if base['wall_s'] else 0.0
+        regressed = change > threshold and new['wall_s'] - base['wall_s'] > min_delta
+        if regressed:
+            regressions.append(key)
+        rss = f"{base['peak_rss_kb'] / 1024:.0f} -> {new['peak_rss_kb'] / 1024:.0f}"
+        print(f"{key[0]:>10,}  {key[1]:<35} {base['wall_s']:>9.3f} {new['wall_s']:>9.3f} "
+              f"{change:>+8.1%}  {rss:>15}{'  REGRESSION' if regressed else ''}")
+
+    for key in sorted(set(baseline) ^ set(candidate)):
+        print(f"{key[0]:>10,}  {key[1]:<35} only in {'baseline' if key in baseline else 'candidate'}")
+    print(f"\n{len(regressions)} regression(s) above {threshold:.0%}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Netflix analysis pipeline")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="benchmark every stage across dataset sizes")
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                            help="dataset sizes in rows, e.g. 1000 100000 1000000 10000000")
+    run_parser.add_argument('--seed', type=int, default=0, help="generator seed")
+    run_parser.add_argument('--output', default='benchmark_results.json', help="results file")
+    run_parser.add_argument('--no-trace-alloc', action='store_true',
+                            help="skip tracemalloc allocation tracking (lower overhead)")
+
+    compare_parser = subparsers.add_parser('compare', help="compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="relative wall-time increase reported as a regression")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args.sizes, args.output, args.seed, not args.no_trace_alloc)
+    else:
+        sys.exit(1 if compare(args.baseline, args.candidate, args.threshold) else 0)
@@ -0,0 +1,92 @@
+"""
+Content-addressed cache for rendered charts
+Skips re-rendering a chart whose aggregated input and style are unchanged
+"""
+
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from fileutil import atomic_write
+
+def content_key(data, style):
+    """Return a hex digest of a chart's input data and style parameters"""
+    digest = hashlib.sha256()
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        digest.update(repr(list(data.index.names)).encode())
+        if isinstance(data, pd.DataFrame):
+            digest.update(repr([str(c) for c in data.columns]).encode())
+            digest.update(repr([str(t) for t in data.dtypes]).encode())
+        else:
+            digest.update(repr((data.name, str(data.dtype))).encode())
+    else:
+        array = np.ascontiguousarray(data)
+        digest.update(repr((array.dtype.str, array.shape)).encode())
+        digest.update(array.tobytes())
+    digest.update(json.dumps(style, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+class ChartCache:
+    """Manifest of rendered chart files and the content key each was rendered from
+
+    Entries are evicted least-recently-used first once there are more than
+    ``max_entries`` of them or their files exceed ``max_bytes`` in total;
+    evicted chart files are deleted.
+    """
+
+    def __init__(self, manifest_path, max_entries=256, max_bytes=None):
+        self.manifest_path = manifest_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.entries = json.load(f)
+
+    def is_fresh(self, path, key):
+        """Return True if ``path`` exists and was rendered from ``key``"""
+        entry = self.entries.get(path)
+        if entry is None or entry['key'] != key or not os.path.exists(path):
+            return False
+        entry['last_used'] = time.time()
+        return True
+
+    def record(self, path, key):
+        """Record that ``path`` was rendered from ``key``"""
+        self.entries[path] = {
+            'key': key,
+            'bytes': os.path.getsize(path),
+            'last_used': time.time(),
+        }
+        self._evict()
+
+    def invalidate(self, path=None):
+        """Forget one chart, or every chart when ``path`` is None"""
+        if path is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(path, None)
+
+    def total_bytes(self):
+        """Return the size of every cached chart file"""
+        return sum(entry['bytes'] for entry in self.entries.values())
+
+    def _evict(self):
+        """Drop least-recently-used entries until within the size limits"""
+        by_age = sorted(self.entries, key=lambda p: self.entries[p]['last_used'])
+        while by_age and (
+            (self.max_entries is not None and len(self.entries) > self.max_entries)
+            or (self.max_bytes is not None and self.total_bytes() > self.max_bytes)
+        ):
+            path = by_age.pop(0)
+            del self.entries[path]
+            if os.path.exists(path):
+                os.remove(path)
+
+    def save(self):
+        """Write the manifest"""
+        with atomic_write(self.manifest_path) as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
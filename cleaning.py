@@ -0,0 +1,157 @@
+"""
+Shared cleaning stage for the Netflix dataset
+Cleans a raw frame in one pass and caches the result keyed by a hash of the source file
+"""
+
+import logging
+import os
+import numpy as np
+import pandas as pd
+from fileutil import atomic_path, file_hash
+from instrumentation import span
+from storage import DATE_FORMAT, read_table, write_table
+
+# Cleaning schema: missing-value fills and columns stored as categoricals
+FILL_VALUES = {
+    'director': 'Unknown',
+    'cast': 'Unknown',
+    'country': 'Unknown',
+    'rating': 'Unknown',
+}
+CATEGORY_COLUMNS = ['type', 'rating', 'country', 'director']
+
+CACHE_DIR = '.cache'
+
+# Bump when clean_frame output changes so stale cached frames are not reused
+CACHE_VERSION = 2
+
+DURATION_PATTERN = r'^\s*(\d+)\s*(min|Season)'
+
+def parse_dates(series):
+    """Parse ``date_added`` strings, using the explicit format as a fast path"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    # A chunk with every date missing is read as float64, which has no .str
+    if not (pd.api.types.is_string_dtype(series) or pd.api.types.is_object_dtype(series)):
+        return pd.to_datetime(series, errors='coerce')
+    values = series.str.strip()
+    parsed = pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+    # Fall back to format inference only for values the fast path missed
+    missed = parsed.isna() & values.notna()
+    if missed.any():
+        parsed[missed] = pd.to_datetime(values[missed], errors='coerce')
+    return parsed
+
+def parse_duration(series):
+    """Split ``duration`` text into ``runtime_minutes`` and ``season_count``
+
+    "95 min" gives a runtime, "3 Seasons" a season count; the other column
+    is missing. Each distinct value is parsed once and mapped back to the
+    rows by its factorized code.
+    """
+    codes, uniques = pd.factorize(series)
+    parts = pd.Series(uniques, dtype=object).str.extract(DURATION_PATTERN)
+    numbers = pd.to_numeric(parts[0], errors='coerce')
+    minutes = numbers.where(parts[1] == 'min').to_numpy()
+    seasons = numbers.where(parts[1] == 'Season').to_numpy()
+    missing = codes < 0
+    runtime = np.where(missing, np.nan, minutes[codes] if len(minutes) else np.nan)
+    season_count = np.where(missing, np.nan, seasons[codes] if len(seasons) else np.nan)
+    return (pd.Series(runtime, index=series.index).astype('Int16'),
+            pd.Series(season_count, index=series.index).astype('Int16'))
+
+def clean_frame(df):
+    """Clean a raw dataset frame in a single pass over its columns
+
+    Fills missing values, parses ``date_added``, makes ``release_year``
+    numeric, converts low-cardinality columns to ``category`` and derives
+    ``year_added``, ``runtime_minutes`` and ``season_count``. Columns not
+    present in ``df`` are skipped.
+    """
+    data = {}
+    for col in df.columns:
+        series = df[col]
+        if col in FILL_VALUES:
+            fill = FILL_VALUES[col]
+            if isinstance(series.dtype, pd.CategoricalDtype) and fill not in series.cat.categories:
+                series = series.cat.add_categories([fill])
+            series = series.fillna(fill)
+        if col == 'date_added':
+            with span('parse_dates', len(series), level=logging.DEBUG):
+                series = parse_dates(series)
+        elif col == 'release_year':
+            series = pd.to_numeric(series, errors='coerce')
+        if col in CATEGORY_COLUMNS and not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+        data[col] = series
+
+    cleaned = pd.DataFrame(data, index=df.index)
+    if 'date_added' in cleaned.columns:
+        cleaned['year_added'] = cleaned['date_added'].dt.year
+    if 'duration' in cleaned.columns:
+        with span('parse_duration', len(cleaned), level=logging.DEBUG):
+            cleaned['runtime_minutes'], cleaned['season_count'] = parse_duration(cleaned['duration'])
+    return cleaned
+
+def cache_path(source_path, cache_dir=None, digest=None):
+    """Return the cache file for the cleaned version of ``source_path``
+
+    Pass ``digest`` when the file hash is already known to avoid re-reading the file.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(source_path)), CACHE_DIR)
+    if digest is None:
+        digest = file_hash(source_path)
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir, f"{name}-clean-v{CACHE_VERSION}-{digest[:16]}.parquet")
+
+def cached_columns(columns):
+    """Add derived columns that belong to a projection of the raw columns"""
+    if columns is None:
+        return None
+    columns = list(columns)
+    if 'date_added' in columns and 'year_added' not in columns:
+        columns.append('year_added')
+    if 'duration' in columns:
+        columns.extend(col for col in ['runtime_minutes', 'season_count'] if col not in columns)
+    return columns
+
+def load_cached(path, columns=None):
+    """Read a cached cleaned frame, or return None when ``path`` does not exist"""
+    if not os.path.exists(path):
+        return None
+    return read_table(path, columns=cached_columns(columns))
+
+def store_cached(path, cleaned):
+    """Write a fully cleaned frame to the cache file ``path``
+
+    Concurrent runs on the same source never read a partially written cache.
+    """
+    with atomic_path(path) as tmp_path:
+        write_table(cleaned, tmp_path)
+
+def build_cache(source_path, cache_dir=None, source_hash=None):
+    """Clean ``source_path`` into its cache file unless a cleaned copy exists
+
+    Pass ``source_hash`` when the file hash is already known. Returns the
+    cache path and whether the cleaned copy was already there.
+    """
+    path = cache_path(source_path, cache_dir, digest=source_hash)
+    if os.path.exists(path):
+        return path, True
+    store_cached(path, clean_frame(read_table(source_path)))
+    return path, False
+
+def load_clean(source_path, columns=None, cache_dir=None, source_hash=None):
+    """Return the cleaned dataset, cleaning and caching it on a cache miss
+
+    Pass ``source_hash`` when the file hash is already known to avoid re-reading the file.
+    """
+    path = cache_path(source_path, cache_dir, digest=source_hash)
+    cleaned = load_cached(path, columns)
+    if cleaned is not None:
+        return cleaned
+    cleaned = clean_frame(read_table(source_path))
+    store_cached(path, cleaned)
+    columns = cached_columns(columns)
+    return cleaned if columns is None else cleaned[columns]
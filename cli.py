@@ -0,0 +1,33 @@
+"""
+Command-line entry point for the Netflix pipeline
+Each subcommand imports only the modules it needs, so analysis-only runs never
+load matplotlib or seaborn, and requests is loaded only when downloading
+"""
+
+import importlib
+import sys
+
+# Subcommand -> (module providing main(), arguments always passed, help)
+COMMANDS = {
+    'generate': ('create_sample_data', [], "create a sample or large synthetic dataset"),
+    'analyze': ('data_analysis', [], "run the analysis and save the processed data"),
+    'render': ('data_visualization', ['--batch'], "render charts headlessly, e.g. --charts bar_chart pie_chart"),
+    'batch': ('batch', [], "analyze and render many datasets, each into its own directory"),
+}
+
+USAGE = "usage: cli.py {generate,analyze,render,batch} [options]\n\ncommands:\n" + "".join(
+    f"  {name:<10}{help_text}\n" for name, (_, _, help_text) in COMMANDS.items()
+) + "\nRun 'cli.py <command> --help' for the options of a command."
+
+def main(argv=None):
+    """Dispatch to the subcommand's module, importing it only now"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS:
+        print(USAGE)
+        return 0 if argv and argv[0] in ('-h', '--help') else 2
+    module_name, fixed_args, _ = COMMANDS[argv[0]]
+    module = importlib.import_module(module_name)
+    return module.main(fixed_args + argv[1:], prog=f"cli.py {argv[0]}") or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
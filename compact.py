@@ -0,0 +1,94 @@
+"""
+Memory-compact representation of the Netflix dataset
+Downcasts years, stores low-cardinality text as categoricals, long text as
+Arrow strings and show_id as an integer surrogate key
+"""
+
+import importlib.util
+import numpy as np
+import pandas as pd
+from cleaning import CATEGORY_COLUMNS
+
+# Long free-text columns: Arrow strings, or left unloaded until needed
+TEXT_COLUMNS = ['description', 'cast']
+
+YEAR_COLUMNS = ['release_year', 'year_added']
+
+# Other string columns become categoricals below this unique/rows ratio
+CATEGORY_THRESHOLD = 0.5
+
+SHOW_ID_PATTERN = r'([A-Za-z]*)(\d+)'
+
+def text_dtype():
+    """Arrow-backed strings when pyarrow is installed, otherwise plain objects"""
+    return 'string[pyarrow]' if importlib.util.find_spec('pyarrow') else object
+
+def csv_dtypes():
+    """Column dtypes to parse a CSV with so the raw frame is already compact"""
+    dtypes = {col: 'category' for col in CATEGORY_COLUMNS}
+    dtypes.update({col: text_dtype() for col in TEXT_COLUMNS})
+    return dtypes
+
+def _downcast_year(series):
+    """Store years as int16, or nullable Int16 when values are missing"""
+    series = pd.to_numeric(series, errors='coerce')
+    return series.astype('Int16' if series.isna().any() else 'int16')
+
+def _show_id_surrogate(series):
+    """Replace show ids with integer keys
+
+    Ids that share a prefix followed by digits (``s1``, ``s2``...) keep their
+    number and the prefix is returned as the label; anything else is
+    factorized and the unique ids are returned as the label lookup.
+    """
+    parts = series.astype(str).str.fullmatch(SHOW_ID_PATTERN)
+    if len(series) and parts.all():
+        pieces = series.astype(str).str.extract(SHOW_ID_PATTERN)
+        if pieces[0].nunique() == 1:
+            numbers = pd.to_numeric(pieces[1])
+            dtype = np.int32 if numbers.max() <= np.iinfo(np.int32).max else np.int64
+            return numbers.astype(dtype), pieces[0].iloc[0]
+    codes, uniques = pd.factorize(series)
+    return pd.Series(codes.astype(np.int32), index=series.index, name=series.name), pd.Index(uniques)
+
+def restore_show_ids(series, labels):
+    """Map surrogate keys back to the original show ids"""
+    if labels is None:
+        return series
+    if isinstance(labels, str):
+        return labels + series.astype(str)
+    return pd.Series(labels.take(series.to_numpy()), index=series.index, name=series.name)
+
+def compact_frame(df):
+    """Return a compact copy of a cleaned frame and the show_id labels
+
+    The labels restore the original ids with ``restore_show_ids`` and are
+    None when ``show_id`` is not present.
+    """
+    data = {}
+    labels = None
+    for col in df.columns:
+        series = df[col]
+        if col == 'show_id':
+            series, labels = _show_id_surrogate(series)
+        elif col in YEAR_COLUMNS:
+            series = _downcast_year(series)
+        elif col in TEXT_COLUMNS:
+            series = series.astype(text_dtype())
+        elif pd.api.types.is_string_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            if series.nunique() <= CATEGORY_THRESHOLD * len(series):
+                series = series.astype('category')
+            else:
+                series = series.astype(text_dtype())
+        data[col] = series
+    return pd.DataFrame(data, index=df.index), labels
+
+def default_memory(series, labels=None):
+    """Bytes a column takes in the default ``pd.read_csv`` representation"""
+    if labels is not None:
+        series = restore_show_ids(series, labels)
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return len(series) * 8
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(series):
+        return int(series.astype(object).memory_usage(deep=True, index=False))
+    return int(series.memory_usage(deep=True, index=False))
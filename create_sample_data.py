@@ -6,47 +6,58 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
+from storage import TableWriter, write_table
 
-def create_sample_netflix_data():
+TITLES = [
+    "Stranger Things", "The Crown", "Money Heist", "Dark", "Ozark",
+    "The Witcher", "Bridgerton", "Squid Game", "Wednesday", "Wednesday",
+    "The Queen's Gambit", "Tiger King", "Outer Banks", "Emily in Paris",
+    "Cobra Kai", "The Umbrella Academy", "You", "Sex Education",
+    "The Good Place", "Black Mirror", "Narcos", "House of Cards",
+    "Orange is the New Black", "13 Reasons Why", "Riverdale",
+    "The Haunting of Hill House", "Russian Doll", "Dead to Me",
+    "Grace and Frankie", "Unbreakable Kimmy Schmidt"
+]
+
+DIRECTORS = [
+    "Duffer Brothers", "Peter Morgan", "Álex Pina", "Baran bo Odar",
+    "Jason Bateman", "Lauren Schmidt", "Chris Van Dusen", "Hwang Dong-hyuk",
+    "Tim Burton", "Scott Frank", "Eric Goode", "Josh Pate",
+    "Darren Star", "Jon Hurwitz", "Steve Blackman", "Greg Berlanti",
+    "Sera Gamble", "Laurie Nunn", "Michael Schur", "Charlie Brooker",
+    "Carlo Bernard", "Beau Willimon", "Jenji Kohan", "Brian Yorkey",
+    "Roberto Aguirre-Sacasa", "Mike Flanagan", "Leslye Headland",
+    "Liz Feldman", "Marta Kauffman", "Tina Fey"
+]
+
+COUNTRIES = [
+    "United States", "United Kingdom", "Spain", "Germany", "South Korea",
+    "Canada", "France", "Italy", "Brazil", "Mexico", "India", "Japan",
+    "Australia", "Netherlands", "Sweden", "Norway", "Denmark", "Poland",
+    "Czech Republic", "Hungary"
+]
+
+RATINGS = ["TV-MA", "TV-14", "TV-PG", "TV-Y7", "TV-Y", "R", "PG-13", "PG", "G"]
+
+TYPES = ["Movie", "TV Show"]
+GENRES = ['Drama', 'Comedy', 'Thriller', 'Romance']
+ADJECTIVES = ['compelling', 'entertaining', 'gripping', 'funny']
+SUBJECTS = ['love', 'adventure', 'mystery', 'friendship']
+
+COLUMNS = ['show_id', 'type', 'title', 'director', 'cast', 'country', 'date_added',
+           'release_year', 'rating', 'duration', 'listed_in', 'description']
+
+# Fixed default for the bulk generator's date_added range, so a seed reproduces the same file on any day
+REFERENCE_DATE = datetime(2024, 12, 31)
+
+def create_sample_netflix_data(output_path='netflix_titles.csv'):
     """Create sample Netflix dataset for analysis"""
     
-    # Sample data
-    titles = [
-        "Stranger Things", "The Crown", "Money Heist", "Dark", "Ozark",
-        "The Witcher", "Bridgerton", "Squid Game", "Wednesday", "Wednesday",
-        "The Queen's Gambit", "Tiger King", "Outer Banks", "Emily in Paris",
-        "Cobra Kai", "The Umbrella Academy", "You", "Sex Education",
-        "The Good Place", "Black Mirror", "Narcos", "House of Cards",
-        "Orange is the New Black", "13 Reasons Why", "Riverdale",
-        "The Haunting of Hill House", "Russian Doll", "Dead to Me",
-        "Grace and Frankie", "Unbreakable Kimmy Schmidt"
-    ]
-    
-    directors = [
-        "Duffer Brothers", "Peter Morgan", "Álex Pina", "Baran bo Odar",
-        "Jason Bateman", "Lauren Schmidt", "Chris Van Dusen", "Hwang Dong-hyuk",
-        "Tim Burton", "Scott Frank", "Eric Goode", "Josh Pate",
-        "Darren Star", "Jon Hurwitz", "Steve Blackman", "Greg Berlanti",
-        "Sera Gamble", "Laurie Nunn", "Michael Schur", "Charlie Brooker",
-        "Carlo Bernard", "Beau Willimon", "Jenji Kohan", "Brian Yorkey",
-        "Roberto Aguirre-Sacasa", "Mike Flanagan", "Leslye Headland",
-        "Liz Feldman", "Marta Kauffman", "Tina Fey"
-    ]
-    
-    countries = [
-        "United States", "United Kingdom", "Spain", "Germany", "South Korea",
-        "Canada", "France", "Italy", "Brazil", "Mexico", "India", "Japan",
-        "Australia", "Netherlands", "Sweden", "Norway", "Denmark", "Poland",
-        "Czech Republic", "Hungary"
-    ]
-    
-    ratings = ["TV-MA", "TV-14", "TV-PG", "TV-Y7", "TV-Y", "R", "PG-13", "PG", "G"]
-    
     # Generate sample data
     data = []
     
     for i in range(100):
-        title = random.choice(titles)
+        title = random.choice(TITLES)
         show_type = random.choice(["Movie", "TV Show"])
         
         if show_type == "Movie":
@@ -61,12 +72,12 @@ def create_sample_netflix_data():
             'show_id': f"s{i+1}",
             'type': show_type,
             'title': title,
-            'director': random.choice(directors),
+            'director': random.choice(DIRECTORS),
             'cast': f"Actor {random.randint(1, 10)}, Actor {random.randint(11, 20)}",
-            'country': random.choice(countries),
+            'country': random.choice(COUNTRIES),
             'date_added': date_added.strftime('%B %d, %Y'),
             'release_year': release_year,
-            'rating': random.choice(ratings),
+            'rating': random.choice(RATINGS),
             'duration': duration,
             'listed_in': f"Action, Adventure, {random.choice(['Drama', 'Comedy', 'Thriller', 'Romance'])}",
             'description': f"A {random.choice(['compelling', 'entertaining', 'gripping', 'funny'])} {show_type.lower()} about {random.choice(['love', 'adventure', 'mystery', 'friendship'])}."
@@ -75,12 +86,111 @@ def create_sample_netflix_data():
     # Create DataFrame
     df = pd.DataFrame(data)
     
-    # Save to CSV
-    df.to_csv('netflix_titles.csv', index=False)
+    # Save as CSV, Parquet or Feather depending on the file extension
+    write_table(df, output_path)
     print(f"Sample Netflix dataset created with {len(df)} records!")
-    print("Dataset saved as 'netflix_titles.csv'")
+    print(f"Dataset saved as '{output_path}'")
     
     return df
 
+def generate_netflix_chunk(rng, start, n_rows, reference_date):
+    """Generate ``n_rows`` sample records in one vectorized batch
+
+    Every column is drawn as an integer code array and mapped onto a
+    precomputed lookup table, so no per-row Python formatting happens.
+    """
+    type_codes = rng.integers(0, len(TYPES), n_rows)
+    is_movie = type_codes == 0
+
+    # Duration: "<80-180> min" for movies, "<1-5> Season(s)" for TV shows
+    minutes = rng.integers(80, 181, n_rows)
+    seasons = rng.integers(1, 6, n_rows)
+    movie_durations = np.array([f"{m} min" for m in range(80, 181)], dtype=object)
+    show_durations = np.array([f"{s} Season{'s' if s > 1 else ''}" for s in range(1, 6)], dtype=object)
+    duration = np.where(is_movie, movie_durations[minutes - 80], show_durations[seasons - 1])
+
+    # Dates: only 1000 distinct offsets exist, so format each once
+    day_offsets = rng.integers(1, 1001, n_rows)
+    date_table = np.array([(reference_date - timedelta(days=int(d))).strftime('%B %d, %Y')
+                           for d in range(1001)], dtype=object)
+
+    cast_table = np.array([f"Actor {a}, Actor {b}" for a in range(1, 11) for b in range(11, 21)],
+                          dtype=object)
+    cast_codes = rng.integers(0, 10, n_rows) * 10 + rng.integers(0, 10, n_rows)
+
+    listed_in_table = np.array([f"Action, Adventure, {g}" for g in GENRES], dtype=object)
+
+    description_table = np.array([f"A {a} {t.lower()} about {s}."
+                                  for a in ADJECTIVES for t in TYPES for s in SUBJECTS], dtype=object)
+    description_codes = (rng.integers(0, len(ADJECTIVES), n_rows) * len(TYPES) * len(SUBJECTS)
+                         + type_codes * len(SUBJECTS)
+                         + rng.integers(0, len(SUBJECTS), n_rows))
+
+    show_ids = np.char.add('s', np.arange(start + 1, start + n_rows + 1).astype(str)).astype(object)
+
+    return pd.DataFrame({
+        'show_id': show_ids,
+        'type': pd.Categorical.from_codes(type_codes, categories=TYPES),
+        'title': np.asarray(TITLES, dtype=object)[rng.integers(0, len(TITLES), n_rows)],
+        'director': pd.Categorical.from_codes(rng.integers(0, len(DIRECTORS), n_rows), categories=DIRECTORS),
+        'cast': cast_table[cast_codes],
+        'country': pd.Categorical.from_codes(rng.integers(0, len(COUNTRIES), n_rows), categories=COUNTRIES),
+        'date_added': date_table[day_offsets],
+        'release_year': rng.integers(2010, 2025, n_rows),
+        'rating': pd.Categorical.from_codes(rng.integers(0, len(RATINGS), n_rows), categories=RATINGS),
+        'duration': duration,
+        'listed_in': listed_in_table[rng.integers(0, len(GENRES), n_rows)],
+        'description': description_table[description_codes],
+    }, columns=COLUMNS)
+
+def iter_netflix_chunks(n_rows, seed=None, chunk_size=1_000_000, reference_date=REFERENCE_DATE):
+    """Yield the sample dataset as DataFrames of at most ``chunk_size`` rows
+
+    The same ``seed``, ``chunk_size`` and ``reference_date`` always
+    reproduce the same rows.
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, chunk_size):
+        yield generate_netflix_chunk(rng, start, min(chunk_size, n_rows - start), reference_date)
+
+def create_large_netflix_data(n_rows, seed=None, chunk_size=1_000_000,
+                              output_path='netflix_titles.csv', reference_date=REFERENCE_DATE):
+    """Create a large sample Netflix dataset, streaming it to disk chunk by chunk
+
+    Peak memory is bounded by ``chunk_size``, not ``n_rows``. The output has
+    the same columns and value formats as ``create_sample_netflix_data``.
+    """
+    written = 0
+    with TableWriter(output_path) as writer:
+        for chunk in iter_netflix_chunks(n_rows, seed, chunk_size, reference_date):
+            writer.write(chunk)
+            written += len(chunk)
+            print(f"Wrote {written:,}/{n_rows:,} records")
+    
+    print(f"Sample Netflix dataset created with {written:,} records!")
+    print(f"Dataset saved as '{output_path}'")
+    
+    return written
+
+def main(argv=None, prog=None):
+    """Run from command-line arguments; ``prog`` names the command in help output"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog=prog, description="Create sample Netflix data for analysis")
+    parser.add_argument('--rows', type=int, help="number of records for the vectorized bulk generator")
+    parser.add_argument('--seed', type=int, help="random seed for reproducible output")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="records generated per chunk")
+    parser.add_argument('--reference-date', type=datetime.fromisoformat, default=REFERENCE_DATE,
+                        help="latest date_added (YYYY-MM-DD); dates are drawn from the 1000 days before it")
+    parser.add_argument('--output', default='netflix_titles.csv',
+                        help="output path; .csv, .parquet or .feather selects the format")
+    args = parser.parse_args(argv)
+    
+    if args.rows is None:
+        create_sample_netflix_data(args.output)
+    else:
+        create_large_netflix_data(args.rows, seed=args.seed, chunk_size=args.chunk_size,
+                                  output_path=args.output, reference_date=args.reference_date)
+
 if __name__ == "__main__":
-    create_sample_netflix_data() 
\ No newline at end of file
+    main() 
\ No newline at end of file
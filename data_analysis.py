@@ -5,45 +5,179 @@ Objective: Learn how to manipulate and analyze data using Python libraries
 
 import pandas as pd
 import numpy as np
-import requests
+import logging
 import os
 from datetime import datetime
+from cleaning import cache_path, clean_frame, load_cached, store_cached
+from compact import TEXT_COLUMNS, compact_frame, csv_dtypes, default_memory, restore_show_ids
+from download import DATASET_URL, fetch, manifest_path, verify
+from fileutil import file_hash
+from incremental import AggregateState, read_appended
+from instrumentation import add_arguments, session, span, traced
+from parallel import ParallelGroupBy
+from query_plan import QueryPlan
+from sketches import SKETCH_COLUMNS, ApproximateAggregates
+from storage import detect_format, iter_table, read_table, table_columns, with_format, write_table
+from streaming import (CountAggregator, FilterCountAggregator, MeanAggregator,
+                       TokenCountAggregator, run_aggregators)
+from token_index import TokenIndex, load_or_build, token_mask
+
+logger = logging.getLogger(__name__)
+
+# Columns each analysis stage reads, used to project chunks in streaming mode
+# (run_analysis loads every column because it exports full filtered rows)
+ANALYSIS_COLUMNS = {
+    'cleaning': ['director', 'cast', 'country', 'rating', 'date_added', 'release_year'],
+    'filtering': ['type', 'release_year', 'duration', 'country'],
+    'grouping': ['type', 'rating', 'release_year', 'country'],
+    'aggregation': ['type', 'release_year', 'date_added', 'rating'],
+}
+
+# Stages run_analysis runs after load_data and explore_data, in order
+ANALYSIS_STAGES = ['data_cleaning', 'filtering_tasks', 'grouping_tasks', 'aggregation_tasks',
+                   'duration_tasks', 'save_processed_data']
+
+def columns_for(*stages):
+    """Return the columns needed to run the given analysis stages"""
+    columns = []
+    for stage in stages:
+        for col in ANALYSIS_COLUMNS[stage]:
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+def is_recent_movie(df):
+    """Mask of movies released after 2010"""
+    return (df['type'] == 'Movie') & (df['release_year'] > 2010).fillna(False).astype(bool)
+
+def is_multi_season_show(df):
+    """Mask of TV shows with more than one season"""
+    return (df['type'] == 'TV Show') & (df['season_count'] > 1).fillna(False).astype(bool)
+
+def in_range(column, low=None, high=None):
+    """Return a predicate masking rows where ``low <= column <= high``
+    
+    Either bound may be omitted; missing values never match.
+    """
+    def predicate(df):
+        mask = df[column].notna()
+        if low is not None:
+            mask &= (df[column] >= low).fillna(False).astype(bool)
+        if high is not None:
+            mask &= (df[column] <= high).fillna(False).astype(bool)
+        return mask
+    return predicate
+
+def is_us_content(df):
+    """Mask of US content, matching whole country tokens"""
+    return token_mask(df['country'], 'United States')
+
+# Every filter, group count and mean the analysis stages use; each is
+# computed once per cleaned frame and shared by all the stages
+ANALYSIS_PLAN = (
+    QueryPlan()
+    .filter('recent_movies', is_recent_movie)
+    .filter('multi_season_shows', is_multi_season_show)
+    .filter('long_movies', in_range('runtime_minutes', low=120))
+    .token_filter('us_content', 'country', 'United States')
+    .count('type')
+    .count('rating')
+    .count('release_year')
+    .token_count('country')
+    .count('year_added')
+    .count(['type', 'rating'])
+    .mean('type', 'release_year')
+    .count('season_count')
+    .mean('type', 'runtime_minutes')
+    .mean('rating', 'runtime_minutes')
+)
 
 class DataAnalyzer:
-    def __init__(self):
+    def __init__(self, dataset_path="netflix_titles.csv", output_format="csv",
+                 compact=False, lazy_text=False, workers=None, output_dir='.'):
         self.df = None
-        self.dataset_path = "netflix_titles.csv"
-        
-    def download_dataset(self):
-        """Download Netflix dataset if not available"""
-        if not os.path.exists(self.dataset_path):
-            print("Downloading Netflix dataset...")
-            # Using a sample Netflix dataset URL
-            url = "https://raw.githubusercontent.com/krishnaik06/Netflix-Data-Analysis/master/netflix_titles.csv"
-            try:
-                response = requests.get(url)
-                with open(self.dataset_path, 'wb') as f:
-                    f.write(response.content)
-                print("Dataset downloaded successfully!")
-            except Exception as e:
-                print(f"Error downloading dataset: {e}")
-                print("Please download the dataset manually from Kaggle")
-        else:
+        self.dataset_path = dataset_path
+        self.output_format = output_format
+        self.output_dir = output_dir
+        self.compact = compact
+        self.lazy_text = lazy_text
+        self.is_compact = False
+        self.show_id_labels = None
+        # Groupbys run on a process pool when more than one worker is requested
+        self.engine = ParallelGroupBy(workers) if workers and workers > 1 else None
+        self.columns = None
+        self.cache_path = None
+        self.is_clean = False
+        self.results = None
+        self.source_hash = None
+        self.index = None
+        
+    @traced
+    def download_dataset(self, url=DATASET_URL):
+        """Download the Netflix dataset, or revalidate a previous download
+        
+        A dataset without a download manifest, such as one generated by
+        create_sample_data.py, is used as is.
+        """
+        if os.path.exists(self.dataset_path) and not os.path.exists(manifest_path(self.dataset_path)):
             print("Dataset already exists!")
+            return
+        print("Downloading Netflix dataset...")
+        try:
+            status = fetch(url, self.dataset_path)
+            if status == 'unchanged':
+                print("Dataset is up to date with the source, not downloaded again.")
+            else:
+                print(f"Dataset {status} successfully! SHA-256 recorded in {manifest_path(self.dataset_path)}")
+        except Exception as e:
+            print(f"Error downloading dataset: {e}")
+            if verify(self.dataset_path):
+                print("Using the previously downloaded dataset, which still matches its checksum.")
+            else:
+                print("Please download the dataset manually from Kaggle")
     
-    def load_data(self):
-        """Load the Netflix dataset"""
+    @traced
+    def load_data(self, columns=None, use_cache=True, source_hash=None):
+        """Load the Netflix dataset, optionally only the given columns
+        
+        If a cleaned copy of the same source file is cached, it is loaded
+        instead and data_cleaning() has nothing left to do. With
+        ``lazy_text`` the long text columns are left out until text_column()
+        asks for them. Pass ``source_hash`` when the file's SHA-256 is
+        already known to avoid reading it again.
+        """
         try:
-            self.df = pd.read_csv(self.dataset_path)
+            self.results = None
+            self.index = None
+            self.is_compact = False
+            self.show_id_labels = None
+            if self.lazy_text and columns is None:
+                columns = [col for col in table_columns(self.dataset_path) if col not in TEXT_COLUMNS]
+            self.columns = columns
+            self.source_hash = source_hash or file_hash(self.dataset_path)
+            self.cache_path = cache_path(self.dataset_path, digest=self.source_hash) if use_cache else None
+            cached = load_cached(self.cache_path, columns) if use_cache else None
+            if cached is not None:
+                self.df = cached
+                self.is_clean = True
+                print(f"Cleaned dataset loaded from cache! Shape: {self.df.shape}")
+                self._compact()
+                return True
+            # Parse straight into categoricals and Arrow strings when compacting
+            dtype = csv_dtypes() if self.compact and detect_format(self.dataset_path) == 'csv' else None
+            if dtype is not None and columns is not None:
+                dtype = {col: t for col, t in dtype.items() if col in columns}
+            self.df = read_table(self.dataset_path, columns=columns, dtype=dtype)
+            self.is_clean = False
             print(f"Dataset loaded successfully! Shape: {self.df.shape}")
             return True
         except FileNotFoundError:
             print("Dataset file not found. Please run download_dataset() first.")
             return False
     
+    @traced
     def explore_data(self):
         """Basic data exploration"""
-        print("\n=== DATA EXPLORATION ===")
         print(f"Dataset shape: {self.df.shape}")
         print(f"\nColumns: {list(self.df.columns)}")
         print(f"\nData types:\n{self.df.dtypes}")
@@ -51,110 +185,340 @@ class DataAnalyzer:
         print(f"\nFirst 5 rows:")
         print(self.df.head())
     
+    @traced
     def data_cleaning(self):
         """Clean the dataset"""
-        print("\n=== DATA CLEANING ===")
-        
-        # Handle missing values
-        print("Handling missing values...")
-        self.df['director'].fillna('Unknown', inplace=True)
-        self.df['cast'].fillna('Unknown', inplace=True)
-        self.df['country'].fillna('Unknown', inplace=True)
-        self.df['rating'].fillna('Unknown', inplace=True)
+        if self.is_clean:
+            print("Using cached cleaned dataset, skipping cleaning.")
+            return
         
-        # Convert date_added to datetime
-        self.df['date_added'] = pd.to_datetime(self.df['date_added'], errors='coerce')
+        # Fill missing values, parse dates, convert categoricals and
+        # derive year_added in one pass
+        print("Cleaning dataset...")
+        self.df = clean_frame(self.df)
+        self.is_clean = True
+        self.results = None
+        self.index = None
         
-        # Extract year from release_year for analysis
-        self.df['release_year'] = pd.to_numeric(self.df['release_year'], errors='coerce')
+        # Only a full frame can stand in for the source on later runs
+        if self.cache_path is not None and self.columns is None:
+            store_cached(self.cache_path, self.df)
+            print(f"Cleaned dataset cached at {self.cache_path}")
         
+        self._compact()
         print("Data cleaning completed!")
     
+    def _compact(self):
+        """Convert the cleaned frame to its compact representation in compact mode"""
+        if not self.compact or self.is_compact:
+            return
+        self.df, self.show_id_labels = compact_frame(self.df)
+        self.is_compact = True
+        self.results = None
+        print(f"Dataset compacted to {self.df.memory_usage(deep=True).sum() / 2**20:.1f} MB")
+    
+    def text_column(self, name):
+        """Return a long text column, loading it on first use when ``lazy_text`` is set"""
+        if name not in self.df.columns:
+            column = load_cached(self.cache_path, [name]) if self.cache_path else None
+            if column is None:
+                column = clean_frame(read_table(self.dataset_path, columns=[name]))
+            series = column[name].set_axis(self.df.index)
+            if self.is_compact:
+                series = compact_frame(series.to_frame())[0][name]
+            self.df[name] = series
+        return self.df[name]
+    
+    @traced
+    def memory_report(self):
+        """Print and return per-column memory, before and after compaction
+        
+        "Before" is the size of the same values in the default pd.read_csv
+        representation: 8-byte numbers and Python string objects.
+        """
+        rows = {}
+        for col in self.df.columns:
+            labels = self.show_id_labels if col == 'show_id' else None
+            before = default_memory(self.df[col], labels)
+            after = int(self.df[col].memory_usage(deep=True, index=False))
+            rows[col] = {'dtype': str(self.df[col].dtype), 'before_bytes': before, 'after_bytes': after}
+        report = pd.DataFrame.from_dict(rows, orient='index')
+        report.loc['total'] = ['', report['before_bytes'].sum(), report['after_bytes'].sum()]
+        report['ratio'] = report['before_bytes'] / report['after_bytes'].where(report['after_bytes'] > 0)
+        print(report.to_string(float_format=lambda x: f"{x:.1f}x"))
+        unloaded = [col for col in TEXT_COLUMNS if col not in self.df.columns]
+        if unloaded:
+            print(f"Not loaded (lazy): {', '.join(unloaded)}")
+        return report
+    
+    def plan_results(self):
+        """Return the shared query results for the current frame, computing them once"""
+        if self.results is None:
+            index = self.token_index()
+            with span('query_plan.execute', len(self.df), level=logging.DEBUG):
+                self.results = ANALYSIS_PLAN.execute(self.df, index, self.engine)
+        return self.results
+    
+    def token_index(self):
+        """Return the token index of the multi-valued columns, loading or building it once
+        
+        The index is persisted next to the dataset and rebuilt when the source changes.
+        """
+        if self.index is None:
+            with span('token_index.load_or_build', len(self.df), level=logging.DEBUG):
+                self.index = load_or_build(self.dataset_path, self.df, self.source_hash)
+        return self.index
+    
+    def token_counts(self, column):
+        """Return per-token row counts for country, cast, listed_in or director"""
+        index = self.token_index()
+        if column not in index.postings:
+            # A lazily loaded text column is indexed when first counted
+            self.text_column(column)
+            index.postings.update(TokenIndex.build(self.df, [column]).postings)
+        return index.counts(column).sort_values(ascending=False)
+    
+    @traced
     def filtering_tasks(self):
         """Perform filtering tasks"""
-        print("\n=== FILTERING TASKS ===")
+        results = self.plan_results()
         
         # Filter movies released after 2010
-        recent_movies = self.df[(self.df['type'] == 'Movie') & (self.df['release_year'] > 2010)]
+        recent_movies = results.rows('recent_movies')
         print(f"Movies released after 2010: {len(recent_movies)}")
         
         # Filter TV shows with duration > 1 season
-        tv_shows = self.df[self.df['type'] == 'TV Show']
-        multi_season_shows = tv_shows[tv_shows['duration'].str.contains('Season', na=False)]
+        multi_season_shows = results.rows('multi_season_shows')
         print(f"TV Shows with multiple seasons: {len(multi_season_shows)}")
         
         # Filter by country (US content)
-        us_content = self.df[self.df['country'].str.contains('United States', na=False)]
+        us_content = results.rows('us_content')
         print(f"US content: {len(us_content)}")
         
         return recent_movies, multi_season_shows, us_content
     
+    def _group_counts(self):
+        """Return the grouped counts shared by grouping_tasks and save_processed_data"""
+        results = self.plan_results()
+        type_counts = results.count('type')
+        rating_counts = results.count('rating').sort_values(ascending=False)
+        yearly_content = results.count('release_year')
+        country_counts = results.token_count('country').sort_values(ascending=False).head(10)
+        return type_counts, rating_counts, yearly_content, country_counts
+    
+    @traced
     def grouping_tasks(self):
         """Perform grouping and aggregation tasks"""
-        print("\n=== GROUPING AND AGGREGATION ===")
+        type_counts, rating_counts, yearly_content, country_counts = self._group_counts()
         
         # Group by type and count
-        type_counts = self.df.groupby('type').size()
         print(f"Content by type:\n{type_counts}")
         
         # Group by rating and count
-        rating_counts = self.df.groupby('rating').size().sort_values(ascending=False)
         print(f"\nContent by rating:\n{rating_counts}")
         
         # Group by release year and count
-        yearly_content = self.df.groupby('release_year').size()
         print(f"\nContent by release year (last 10 years):\n{yearly_content.tail(10)}")
         
         # Group by country and count (top 10)
-        country_counts = self.df.groupby('country').size().sort_values(ascending=False).head(10)
         print(f"\nContent by country (top 10):\n{country_counts}")
         
         return type_counts, rating_counts, yearly_content, country_counts
     
+    @traced
     def aggregation_tasks(self):
         """Perform aggregation tasks"""
-        print("\n=== AGGREGATION TASKS ===")
+        results = self.plan_results()
         
         # Average release year by type
-        avg_year_by_type = self.df.groupby('type')['release_year'].mean()
+        avg_year_by_type = results.mean('type', 'release_year')
         print(f"Average release year by type:\n{avg_year_by_type}")
         
         # Content added by year
-        self.df['year_added'] = self.df['date_added'].dt.year
-        yearly_additions = self.df.groupby('year_added').size()
+        yearly_additions = results.count('year_added')
         print(f"\nContent added by year:\n{yearly_additions}")
         
         # Rating distribution by type
-        rating_by_type = self.df.groupby(['type', 'rating']).size().unstack(fill_value=0)
+        rating_by_type = results.count(['type', 'rating']).unstack(fill_value=0)
         print(f"\nRating distribution by type:\n{rating_by_type}")
         
         return avg_year_by_type, yearly_additions, rating_by_type
     
-    def save_processed_data(self):
-        """Save processed data for visualization"""
-        print("\n=== SAVING PROCESSED DATA ===")
+    def runtime_histogram(self, bin_width=10):
+        """Count movies per runtime bin of ``bin_width`` minutes, indexed by bin start"""
+        runtimes = self.df['runtime_minutes'].dropna().to_numpy(dtype='int64')
+        if len(runtimes) == 0:
+            return pd.Series(dtype='int64', name='count').rename_axis('runtime_bin')
+        start = runtimes.min() // bin_width * bin_width
+        counts = np.bincount((runtimes - start) // bin_width)
+        bins = start + np.arange(len(counts)) * bin_width
+        return pd.Series(counts, index=pd.Index(bins, name='runtime_bin'), name='count')
+    
+    @traced
+    def duration_tasks(self):
+        """Perform numeric duration analysis on runtime_minutes and season_count"""
+        results = self.plan_results()
+        
+        # Range filter on parsed runtimes
+        long_movies = results.rows('long_movies')
+        print(f"Movies of 2 hours or more: {len(long_movies)}")
+        
+        # Shows per season count
+        season_counts = results.count('season_count')
+        print(f"\nTV shows by number of seasons:\n{season_counts}")
+        
+        # Mean runtime by type and rating
+        runtime_by_type = results.mean('type', 'runtime_minutes')
+        print(f"\nAverage runtime (minutes) by type:\n{runtime_by_type}")
+        runtime_by_rating = results.mean('rating', 'runtime_minutes')
+        print(f"\nAverage runtime (minutes) by rating:\n{runtime_by_rating}")
+        
+        # Runtime histogram from integer bin counts
+        runtime_histogram = self.runtime_histogram()
+        print(f"\nMovie runtime distribution (10-minute bins):\n{runtime_histogram}")
+        
+        return season_counts, runtime_by_type, runtime_by_rating, runtime_histogram
+    
+    @traced
+    def streaming_tasks(self, chunk_size=1_000_000):
+        """Run filtering, grouping and aggregation over the source in chunks
+        
+        Each chunk is cleaned and folded into incremental aggregators, so peak
+        memory is set by ``chunk_size`` rather than the file size. Results
+        match the in-memory filtering_tasks, grouping_tasks and aggregation_tasks.
+        """
+        logger.info("Streaming analysis in chunks of %s rows", f"{chunk_size:,}")
+        
+        aggregators = {
+            'recent_movies': FilterCountAggregator(is_recent_movie),
+            'multi_season_shows': FilterCountAggregator(is_multi_season_show),
+            'us_content': FilterCountAggregator(is_us_content),
+            'type_counts': CountAggregator('type'),
+            'rating_counts': CountAggregator('rating'),
+            'yearly_content': CountAggregator('release_year'),
+            'country_counts': TokenCountAggregator('country'),
+            'avg_year_by_type': MeanAggregator('type', 'release_year'),
+            'yearly_additions': CountAggregator('year_added'),
+            'rating_by_type': CountAggregator(['type', 'rating']),
+        }
+        columns = columns_for('filtering', 'grouping', 'aggregation')
+        chunks = iter_table(self.dataset_path, chunk_size, columns=columns)
+        results = run_aggregators(chunks, aggregators, transform=clean_frame)
+        
+        # Finish the orderings and reshapes the in-memory tasks apply
+        results['rating_counts'] = results['rating_counts'].sort_values(ascending=False)
+        results['country_counts'] = results['country_counts'].sort_values(ascending=False).head(10)
+        results['rating_by_type'] = results['rating_by_type'].unstack(fill_value=0)
+        
+        print(f"Movies released after 2010: {results['recent_movies']}")
+        print(f"TV Shows with multiple seasons: {results['multi_season_shows']}")
+        print(f"US content: {results['us_content']}")
+        print(f"\nContent by type:\n{results['type_counts']}")
+        print(f"\nContent by rating:\n{results['rating_counts']}")
+        print(f"\nContent by release year (last 10 years):\n{results['yearly_content'].tail(10)}")
+        print(f"\nContent by country (top 10):\n{results['country_counts']}")
+        print(f"\nAverage release year by type:\n{results['avg_year_by_type']}")
+        print(f"\nContent added by year:\n{results['yearly_additions']}")
+        print(f"\nRating distribution by type:\n{results['rating_by_type']}")
+        
+        return results
+    
+    @traced
+    def approximate_tasks(self, chunk_size=1_000_000, sketch_path=None):
+        """Approximate distinct counts, top countries and release-year quantiles
+        
+        One streaming pass builds HyperLogLog, SpaceSaving and t-digest
+        sketches (see sketches.py for their error bounds), so memory stays
+        fixed and nothing is sorted per group. Passing ``sketch_path`` saves
+        the sketches so runs over other partitions can be merged with them.
+        """
+        logger.info("Approximate analysis in chunks of %s rows", f"{chunk_size:,}")
+        aggregates = ApproximateAggregates()
+        for chunk in iter_table(self.dataset_path, chunk_size, columns=SKETCH_COLUMNS):
+            aggregates.update(clean_frame(chunk))
+        if sketch_path is not None:
+            aggregates.save(sketch_path)
+            logger.info("Sketches saved to %s", sketch_path)
+        
+        results = aggregates.results()
+        print(f"Distinct directors (approx.): {results['distinct_director']:,}")
+        print(f"Distinct cast members (approx.): {results['distinct_cast']:,}")
+        print(f"\nContent by country (top 10, approx.):\n{results['top_country']}")
+        print(f"\nRelease year quantiles by type (approx.):\n{results['release_year_quantiles']}")
+        
+        return results
+    
+    @traced
+    def incremental_update(self, state_path=None):
+        """Merge only the rows appended since the last update into persisted aggregates
+        
+        The aggregate state (counts, plus sums and counts for the means) and
+        a high-water mark are kept in ``state_path``; the exported aggregate
+        files are then refreshed from the updated state.
+        """
+        if state_path is None:
+            directory, filename = os.path.split(os.path.abspath(self.dataset_path))
+            state_path = os.path.join(directory, '.cache', f"{filename}-aggregates.json")
+        
+        state = AggregateState.load(state_path)
+        new_rows, position = read_appended(self.dataset_path, state)
+        print(f"New rows since last update: {len(new_rows)}")
+        
+        state.update(clean_frame(new_rows))
+        state.advance(position)
+        state.save(state_path)
         
-        # Save filtered datasets
-        recent_movies, multi_season_shows, us_content = self.filtering_tasks()
+        aggregates = state.aggregates()
+        for name in ['type_counts', 'rating_counts', 'yearly_content', 'country_counts',
+                     'avg_year_by_type', 'yearly_additions', 'rating_by_type']:
+            write_table(aggregates[name], self._output_path(name), index=True)
+        print(f"Aggregates refreshed; high-water mark: show_id number {state.max_show_id}, "
+              f"date_added {state.max_date_added}")
         
-        recent_movies.to_csv('recent_movies.csv', index=False)
-        multi_season_shows.to_csv('multi_season_shows.csv', index=False)
-        us_content.to_csv('us_content.csv', index=False)
+        return aggregates
+    
+    def _output_path(self, name):
+        """Return the output file path for a processed dataset"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, with_format(name, self.output_format))
+    
+    def _export_rows(self, rows):
+        """Return filtered rows as full source rows, with surrogate show ids mapped back
+        
+        With ``lazy_text`` the unloaded text columns are loaded now, since
+        exports carry every column, and put back in their source position.
+        """
+        if self.lazy_text:
+            missing = [col for col in TEXT_COLUMNS if col not in rows.columns]
+            rows = rows.assign(**{col: self.text_column(col).loc[rows.index] for col in missing})
+            source = table_columns(self.dataset_path)
+            rows = rows[[col for col in source if col in rows.columns]
+                        + [col for col in rows.columns if col not in source]]
+        if self.show_id_labels is None or 'show_id' not in rows.columns:
+            return rows
+        return rows.assign(show_id=restore_show_ids(rows['show_id'], self.show_id_labels))
+    
+    @traced
+    def save_processed_data(self):
+        """Save processed data for visualization"""
+        # Save filtered datasets, reusing the cached filter results
+        results = self.plan_results()
+        for name in ['recent_movies', 'multi_season_shows', 'us_content']:
+            write_table(self._export_rows(results.rows(name)), self._output_path(name))
         
         # Save aggregated data
-        type_counts, rating_counts, yearly_content, country_counts = self.grouping_tasks()
+        type_counts, rating_counts, yearly_content, country_counts = self._group_counts()
         
-        type_counts.to_csv('type_counts.csv')
-        rating_counts.to_csv('rating_counts.csv')
-        yearly_content.to_csv('yearly_content.csv')
-        country_counts.to_csv('country_counts.csv')
+        write_table(type_counts, self._output_path('type_counts'))
+        write_table(rating_counts, self._output_path('rating_counts'))
+        write_table(yearly_content, self._output_path('yearly_content'))
+        write_table(country_counts, self._output_path('country_counts'))
         
         print("Processed data saved successfully!")
     
+    @traced
     def run_analysis(self):
         """Run complete data analysis"""
-        print("=== NETFLIX DATA ANALYSIS ===")
-        
         # Download and load data
         self.download_dataset()
         if not self.load_data():
@@ -162,16 +526,55 @@ class DataAnalyzer:
         
         # Perform analysis tasks
         self.explore_data()
-        self.data_cleaning()
-        self.filtering_tasks()
-        self.grouping_tasks()
-        self.aggregation_tasks()
-        self.save_processed_data()
-        
-        print("\n=== DATA ANALYSIS COMPLETED ===")
-        print("All analysis tasks completed successfully!")
-        print("Check the generated CSV files for processed data.")
+        for stage in ANALYSIS_STAGES:
+            getattr(self, stage)()
+            if stage == 'data_cleaning' and self.compact:
+                self.memory_report()
+        if self.engine is not None:
+            self.engine.close()
+        
+        logger.info("All analysis tasks completed successfully! Check the generated %s files "
+                    "in %s for processed data.", self.output_format.upper(), self.output_dir)
+
+def main(argv=None, prog=None):
+    """Run from command-line arguments; ``prog`` names the command in help output"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog=prog, description="Netflix data analysis")
+    parser.add_argument('--dataset', default="netflix_titles.csv",
+                        help="dataset path (.csv, .parquet or .feather)")
+    parser.add_argument('--output-format', default="csv", choices=['csv', 'parquet', 'feather'],
+                        help="format of the processed output files")
+    parser.add_argument('--output-dir', default='.', help="directory for the processed output files")
+    parser.add_argument('--stream', action='store_true',
+                        help="aggregate the dataset in chunks instead of loading it into memory")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000,
+                        help="rows per chunk in streaming mode")
+    parser.add_argument('--incremental', action='store_true',
+                        help="merge only rows appended since the last run into the saved aggregates")
+    parser.add_argument('--compact', action='store_true',
+                        help="downcast and categorize columns to reduce memory, then print a memory report")
+    parser.add_argument('--lazy-text', action='store_true',
+                        help="load the description and cast columns only when needed")
+    parser.add_argument('--approximate', action='store_true',
+                        help="estimate distinct counts, top countries and quantiles from sketches in one pass")
+    parser.add_argument('--sketch-output', help="save the approximate-mode sketches to this JSON file")
+    parser.add_argument('--workers', type=int,
+                        help="processes for the group counts and means (default: single-process)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    analyzer = DataAnalyzer(args.dataset, args.output_format, args.compact, args.lazy_text, args.workers,
+                            args.output_dir)
+    with session(args.trace, args.trace_format, args.profile, args.log_format, args.log_level):
+        if args.incremental:
+            analyzer.incremental_update()
+        elif args.approximate:
+            analyzer.approximate_tasks(args.chunk_size, args.sketch_output)
+        elif args.stream:
+            analyzer.streaming_tasks(args.chunk_size)
+        else:
+            analyzer.run_analysis()
 
 if __name__ == "__main__":
-    analyzer = DataAnalyzer()
-    analyzer.run_analysis() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -4,221 +4,593 @@ Objective: Create various types of data visualizations using Matplotlib and Seab
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
+import importlib
+import logging
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from chart_cache import ChartCache, content_key
+from cleaning import load_clean
+from instrumentation import TRACER, add_arguments, session, span, traced
+from query_plan import QueryPlan
+
+logger = logging.getLogger(__name__)
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+    
+    ``on_import`` runs once, right after the import.
+    """
+    
+    def __init__(self, name, on_import=None):
+        self._name = name
+        self._on_import = on_import
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+            if self._on_import is not None:
+                self._on_import()
+        return getattr(self._module, attr)
+
+# Plotting libraries load only when a chart is drawn; the shared style is
+# applied when pyplot is first used
+plt = LazyModule('matplotlib.pyplot', on_import=lambda: apply_style())
+sns = LazyModule('seaborn')
+
+# Columns the charts read, used for column projection on load
+VISUALIZATION_COLUMNS = ['type', 'rating', 'release_year', 'date_added']
+
+# Group counts the charts draw; each is computed once per loaded frame
+VISUALIZATION_PLAN = (
+    QueryPlan()
+    .count('year_added')
+    .count(['year_added', 'type'])
+    .count('rating')
+    .count('type')
+    .count(['type', 'rating'])
+    .count('release_year')
+    .count(['type', 'release_year'])
+)
+
+PLOT_STYLE = 'seaborn-v0_8'
+
+# Above this many rows, charts are drawn from binned counts instead of raw rows
+BINNED_ROW_THRESHOLD = 100_000
+
+# Content type -> point color, also mixed per cell in the binned scatter plot
+TYPE_COLORS = {'Movie': 'blue', 'TV Show': 'red'}
+
+# Chart name -> output file name (without extension)
+CHART_FILES = {
+    'line_chart': 'line_chart_content_over_time',
+    'area_chart': 'area_chart_content_type_distribution',
+    'bar_chart': 'bar_chart_content_by_rating',
+    'histogram': 'histogram_release_year_distribution',
+    'scatter_plot': 'scatter_plot_release_vs_added',
+    'pie_chart': 'pie_chart_content_type_distribution',
+    'heatmap': 'heatmap_rating_by_type',
+    'box_plot': 'box_plot_release_year_by_type',
+}
+
+def apply_style():
+    """Apply the shared visualization style"""
+    plt.style.use(PLOT_STYLE)
+    sns.set_palette("husl")
+    plt.rcParams['figure.figsize'] = (12, 8)
+    plt.rcParams['font.size'] = 10
+
+def chart_path(name, output_dir='.', fmt='png'):
+    """Return the output file path for a chart"""
+    return os.path.join(output_dir, f"{CHART_FILES[name]}.{fmt}")
+
+def draw_line_chart(yearly_additions, path, dpi=300):
+    """Draw content added per year"""
+    fig = plt.figure(figsize=(12, 6))
+    plt.plot(yearly_additions.index, yearly_additions.values, marker='o', linewidth=2, markersize=6)
+    plt.title('Netflix Content Added Over Time', fontsize=16, fontweight='bold')
+    plt.xlabel('Year', fontsize=12)
+    plt.ylabel('Number of Titles Added', fontsize=12)
+    plt.grid(True, alpha=0.3)
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def draw_area_chart(yearly_by_type, path, dpi=300):
+    """Draw content added per year, stacked by type"""
+    fig = plt.figure(figsize=(12, 6))
+    plt.stackplot(yearly_by_type.index, yearly_by_type.values.T,
+                 labels=yearly_by_type.columns, alpha=0.7)
+    plt.title('Netflix Content Type Distribution Over Time', fontsize=16, fontweight='bold')
+    plt.xlabel('Year', fontsize=12)
+    plt.ylabel('Number of Titles', fontsize=12)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def draw_bar_chart(rating_counts, path, dpi=300):
+    """Draw content per rating"""
+    fig = plt.figure(figsize=(12, 6))
+    bars = plt.bar(range(len(rating_counts)), rating_counts.values,
+                   color=sns.color_palette("husl", len(rating_counts)))
+    plt.title('Netflix Content by Rating', fontsize=16, fontweight='bold')
+    plt.xlabel('Rating', fontsize=12)
+    plt.ylabel('Number of Titles', fontsize=12)
+    plt.xticks(range(len(rating_counts)), rating_counts.index, rotation=45)
+    
+    # Add value labels on bars
+    for i, v in enumerate(rating_counts.values):
+        plt.text(i, v + max(rating_counts.values) * 0.01, str(v),
+                ha='center', va='bottom', fontweight='bold')
+    
+    plt.grid(True, alpha=0.3, axis='y')
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def draw_histogram(release_years, path, dpi=300):
+    """Draw the release year distribution"""
+    fig = plt.figure(figsize=(12, 6))
+    plt.hist(release_years, bins=30, alpha=0.7, edgecolor='black')
+    plt.title('Distribution of Netflix Content Release Years', fontsize=16, fontweight='bold')
+    plt.xlabel('Release Year', fontsize=12)
+    plt.ylabel('Frequency', fontsize=12)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def draw_scatter_plot(plot_data, path, dpi=300):
+    """Draw release year against year added, colored by type"""
+    fig = plt.figure(figsize=(12, 6))
+    plt.scatter(plot_data['release_year'], plot_data['year_added'],
+               alpha=0.6, s=30, c=plot_data['type'].map({'Movie': 'blue', 'TV Show': 'red'}))
+    plt.title('Release Year vs Year Added to Netflix', fontsize=16, fontweight='bold')
+    plt.xlabel('Release Year', fontsize=12)
+    plt.ylabel('Year Added to Netflix', fontsize=12)
+    plt.grid(True, alpha=0.3)
+    
+    # Add legend
+    from matplotlib.lines import Line2D
+    legend_elements = [Line2D([0], [0], marker='o', color='w',
+                             markerfacecolor='blue', markersize=8, label='Movie'),
+                      Line2D([0], [0], marker='o', color='w',
+                             markerfacecolor='red', markersize=8, label='TV Show')]
+    plt.legend(handles=legend_elements)
+    
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def draw_pie_chart(type_counts, path, dpi=300):
+    """Draw the share of each content type"""
+    fig = plt.figure(figsize=(10, 8))
+    colors = ['#ff9999', '#66b3ff']
+    explode = (0.05, 0.05)
+    
+    plt.pie(type_counts.values, labels=type_counts.index, autopct='%1.1f%%',
+            startangle=90, colors=colors, explode=explode, shadow=True)
+    plt.title('Netflix Content Type Distribution', fontsize=16, fontweight='bold')
+    plt.axis('equal')
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def draw_heatmap(rating_by_type, path, dpi=300):
+    """Draw rating counts by content type"""
+    fig = plt.figure(figsize=(12, 6))
+    sns.heatmap(rating_by_type, annot=True, fmt='d', cmap='YlOrRd', cbar_kws={'label': 'Count'})
+    plt.title('Rating Distribution by Content Type', fontsize=16, fontweight='bold')
+    plt.xlabel('Rating', fontsize=12)
+    plt.ylabel('Content Type', fontsize=12)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def draw_box_plot(plot_data, path, dpi=300):
+    """Draw the release year distribution by content type"""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    plot_data.boxplot(column='release_year', by='type', ax=ax)
+    plt.title('Release Year Distribution by Content Type', fontsize=16, fontweight='bold')
+    plt.suptitle('')  # Remove default suptitle
+    plt.xlabel('Content Type', fontsize=12)
+    plt.ylabel('Release Year', fontsize=12)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def bin_scatter(plot_data):
+    """Count titles per (release year, year added) cell on integer-year bins, per type
+    
+    Returns a frame indexed by (type, year_added) with a column per release
+    year, so drawing it costs the number of cells rather than rows.
+    """
+    x = plot_data['release_year'].to_numpy(dtype='int64')
+    y = plot_data['year_added'].to_numpy(dtype='int64')
+    types = plot_data['type'].astype(str).to_numpy()
+    x_years = np.arange(x.min(), x.max() + 1) if len(x) else np.arange(0)
+    y_years = np.arange(y.min(), y.max() + 1) if len(y) else np.arange(0)
+    grids = {}
+    for kind in sorted(set(types)):
+        selected = types == kind
+        grid, _, _ = np.histogram2d(y[selected], x[selected],
+                                    bins=[np.append(y_years, y_years[-1] + 1) - 0.5,
+                                          np.append(x_years, x_years[-1] + 1) - 0.5])
+        grids[kind] = pd.DataFrame(grid.astype('int64'), index=pd.Index(y_years, name='year_added'),
+                                   columns=pd.Index(x_years, name='release_year'))
+    if not grids:
+        return pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=['type', 'year_added']))
+    return pd.concat(grids, names=['type'])
+
+def box_stats(value_counts, label):
+    """Box plot statistics from per-value counts
+    
+    Quartiles use the same linear interpolation as matplotlib's boxplot
+    does on the raw values, so the drawn boxes are identical.
+    """
+    values = value_counts.index.to_numpy(dtype=float)
+    cumulative = np.cumsum(value_counts.to_numpy())
+    n = cumulative[-1]
+    
+    def quantile(q):
+        position = q * (n - 1)
+        low = values[np.searchsorted(cumulative, np.floor(position), side='right')]
+        high = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+        return low + (high - low) * (position - np.floor(position))
+    
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {
+        'label': label, 'q1': q1, 'med': median, 'q3': q3,
+        'mean': float(np.dot(values, value_counts.to_numpy()) / n),
+        'whislo': inside.min() if len(inside) else q1,
+        'whishi': inside.max() if len(inside) else q3,
+        # Each distinct outlying value is drawn once
+        'fliers': values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)],
+    }
+
+def draw_binned_histogram(year_counts, path, dpi=300):
+    """Draw the release year distribution from per-year counts"""
+    fig = plt.figure(figsize=(12, 6))
+    plt.hist(year_counts.index.to_numpy(dtype=float), bins=30, weights=year_counts.to_numpy(),
+             alpha=0.7, edgecolor='black')
+    plt.title('Distribution of Netflix Content Release Years', fontsize=16, fontweight='bold')
+    plt.xlabel('Release Year', fontsize=12)
+    plt.ylabel('Frequency', fontsize=12)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def draw_binned_scatter_plot(grids, path, dpi=300):
+    """Draw release year against year added as a density image
+    
+    Each cell is colored by the mix of content types in it and made more
+    opaque the more titles it holds (log scale).
+    """
+    from matplotlib.colors import to_rgb
+    from matplotlib.lines import Line2D
+    
+    fig = plt.figure(figsize=(12, 6))
+    kinds = list(grids.index.get_level_values('type').unique())
+    if kinds:
+        counts = np.stack([grids.xs(kind).to_numpy() for kind in kinds])
+        total = counts.sum(axis=0)
+        colors = np.array([to_rgb(TYPE_COLORS.get(kind, 'green')) for kind in kinds])
+        rgb = np.einsum('kyx,kc->yxc', counts, colors) / np.maximum(total, 1)[..., None]
+        density = np.log1p(total) / np.log1p(max(total.max(), 1))
+        alpha = np.where(total > 0, 0.2 + 0.7 * density, 0.0)
+        columns, index = grids.columns, grids.xs(kinds[0]).index
+        extent = [columns[0] - 0.5, columns[-1] + 0.5, index[0] - 0.5, index[-1] + 0.5]
+        plt.imshow(np.dstack([rgb, alpha]), origin='lower', extent=extent, aspect='auto',
+                   interpolation='nearest')
+    legend_elements = [Line2D([0], [0], marker='s', color='w', markersize=8, label=kind,
+                              markerfacecolor=TYPE_COLORS.get(kind, 'green'))
+                       for kind in kinds]
+    plt.title('Release Year vs Year Added to Netflix', fontsize=16, fontweight='bold')
+    plt.xlabel('Release Year', fontsize=12)
+    plt.ylabel('Year Added to Netflix', fontsize=12)
+    plt.grid(True, alpha=0.3)
+    plt.legend(handles=legend_elements)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+def draw_binned_box_plot(year_counts_by_type, path, dpi=300):
+    """Draw the release year distribution by content type from per-year counts"""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    kinds = year_counts_by_type.index.get_level_values('type').unique().sort_values()
+    ax.bxp([box_stats(year_counts_by_type.xs(kind), kind) for kind in kinds])
+    plt.title('Release Year Distribution by Content Type', fontsize=16, fontweight='bold')
+    plt.xlabel('Content Type', fontsize=12)
+    plt.ylabel('Release Year', fontsize=12)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
+
+# Chart name -> draw function taking (data, path, dpi)
+CHART_RENDERERS = {
+    'line_chart': draw_line_chart,
+    'area_chart': draw_area_chart,
+    'bar_chart': draw_bar_chart,
+    'histogram': draw_histogram,
+    'scatter_plot': draw_scatter_plot,
+    'pie_chart': draw_pie_chart,
+    'heatmap': draw_heatmap,
+    'box_plot': draw_box_plot,
+}
+
+# Draw functions for the charts that otherwise read every row, used in binned mode
+BINNED_RENDERERS = {
+    'histogram': draw_binned_histogram,
+    'scatter_plot': draw_binned_scatter_plot,
+    'box_plot': draw_binned_box_plot,
+}
+
+def renderer(name, binned=False):
+    """Return the draw function for a chart"""
+    if binned and name in BINNED_RENDERERS:
+        return BINNED_RENDERERS[name]
+    return CHART_RENDERERS[name]
+
+def _init_render_worker():
+    """Set up a render worker process with a headless backend"""
+    plt.switch_backend('Agg')
+    apply_style()
+
+def render_chart(name, data, path, dpi=300, binned=False):
+    """Draw one chart to ``path`` and return its span record
+
+    The record (start, duration_s, pid, ...) is returned rather than kept
+    because this runs in a worker process with its own tracer.
+    """
+    with span(f"render_chart.{name}", level=logging.DEBUG, path=path, binned=binned):
+        fig = renderer(name, binned)(data, path, dpi)
+        plt.close(fig)
+    return TRACER.spans.pop()
 
 class DataVisualizer:
-    def __init__(self):
+    def __init__(self, dataset_path="netflix_titles.csv", binned=None):
         self.df = None
-        self.setup_style()
-        
+        self.results = None
+        self.dataset_path = dataset_path
+        self.binned = binned
+    
     def setup_style(self):
         """Setup visualization style"""
-        plt.style.use('seaborn-v0_8')
-        sns.set_palette("husl")
-        plt.rcParams['figure.figsize'] = (12, 8)
-        plt.rcParams['font.size'] = 10
+        apply_style()
+    
+    @traced
+    def load_data(self, source_hash=None):
+        """Load the cleaned Netflix data, reusing the analyzer's cleaning cache
         
-    def load_data(self):
-        """Load the processed Netflix data"""
+        Pass ``source_hash`` when the dataset's SHA-256 is already known.
+        """
         try:
-            self.df = pd.read_csv("netflix_titles.csv")
+            self.df = load_clean(self.dataset_path, columns=VISUALIZATION_COLUMNS, source_hash=source_hash)
+            self.results = None
             print("Data loaded successfully!")
             return True
         except FileNotFoundError:
             print("Please run data_analysis.py first to generate the dataset.")
             return False
     
+    def plan_results(self):
+        """Return the shared query results for the loaded frame, computing them once"""
+        if self.results is None:
+            with span('query_plan.execute', len(self.df), level=logging.DEBUG):
+                self.results = VISUALIZATION_PLAN.execute(self.df)
+        return self.results
+    
+    def is_binned(self):
+        """Return True if charts are drawn from binned counts
+        
+        Unless set explicitly, binning is used above BINNED_ROW_THRESHOLD rows.
+        """
+        if self.binned is not None:
+            return self.binned
+        return len(self.df) > BINNED_ROW_THRESHOLD
+    
+    def chart_data(self, name):
+        """Return the aggregated input a chart is drawn from"""
+        results = self.plan_results()
+        if name == 'line_chart':
+            return results.count('year_added')
+        if name == 'area_chart':
+            return results.count(['year_added', 'type']).unstack(fill_value=0)
+        if name == 'bar_chart':
+            return results.count('rating').sort_values(ascending=False)
+        if name == 'histogram':
+            if self.is_binned():
+                return results.count('release_year')
+            return self.df['release_year'].dropna().to_numpy()
+        if name == 'scatter_plot':
+            # Filter out NaN values
+            plot_data = self.df.dropna(subset=['release_year', 'year_added'])[['release_year', 'year_added', 'type']]
+            return bin_scatter(plot_data) if self.is_binned() else plot_data
+        if name == 'pie_chart':
+            return results.count('type')
+        if name == 'heatmap':
+            return results.count(['type', 'rating']).unstack(fill_value=0)
+        if name == 'box_plot':
+            if self.is_binned():
+                return results.count(['type', 'release_year'])
+            return self.df[['release_year', 'type']]
+        raise ValueError(f"Unknown chart '{name}'. Expected one of: {', '.join(CHART_FILES)}")
+    
+    @traced
     def line_chart(self):
         """Line Chart: Display trends over time"""
         print("Creating Line Chart: Content Added Over Time")
-        
-        # Prepare data
-        self.df['date_added'] = pd.to_datetime(self.df['date_added'], errors='coerce')
-        self.df['year_added'] = self.df['date_added'].dt.year
-        yearly_additions = self.df.groupby('year_added').size()
-        
-        plt.figure(figsize=(12, 6))
-        plt.plot(yearly_additions.index, yearly_additions.values, marker='o', linewidth=2, markersize=6)
-        plt.title('Netflix Content Added Over Time', fontsize=16, fontweight='bold')
-        plt.xlabel('Year', fontsize=12)
-        plt.ylabel('Number of Titles Added', fontsize=12)
-        plt.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('line_chart_content_over_time.png', dpi=300, bbox_inches='tight')
+        draw_line_chart(self.chart_data('line_chart'), chart_path('line_chart'))
         plt.show()
-        
+    
+    @traced
     def area_chart(self):
         """Area Chart: A line chart with area between axis and line filled with color"""
         print("Creating Area Chart: Content Type Distribution Over Time")
-        
-        # Prepare data
-        self.df['date_added'] = pd.to_datetime(self.df['date_added'], errors='coerce')
-        self.df['year_added'] = self.df['date_added'].dt.year
-        
-        yearly_by_type = self.df.groupby(['year_added', 'type']).size().unstack(fill_value=0)
-        
-        plt.figure(figsize=(12, 6))
-        plt.stackplot(yearly_by_type.index, yearly_by_type.values.T, 
-                     labels=yearly_by_type.columns, alpha=0.7)
-        plt.title('Netflix Content Type Distribution Over Time', fontsize=16, fontweight='bold')
-        plt.xlabel('Year', fontsize=12)
-        plt.ylabel('Number of Titles', fontsize=12)
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig('area_chart_content_type_distribution.png', dpi=300, bbox_inches='tight')
+        draw_area_chart(self.chart_data('area_chart'), chart_path('area_chart'))
         plt.show()
-        
+    
+    @traced
     def bar_chart(self):
         """Bar Chart: Display trends with multiple variables"""
         print("Creating Bar Chart: Content by Rating")
-        
-        rating_counts = self.df.groupby('rating').size().sort_values(ascending=False)
-        
-        plt.figure(figsize=(12, 6))
-        bars = plt.bar(range(len(rating_counts)), rating_counts.values, 
-                       color=sns.color_palette("husl", len(rating_counts)))
-        plt.title('Netflix Content by Rating', fontsize=16, fontweight='bold')
-        plt.xlabel('Rating', fontsize=12)
-        plt.ylabel('Number of Titles', fontsize=12)
-        plt.xticks(range(len(rating_counts)), rating_counts.index, rotation=45)
-        
-        # Add value labels on bars
-        for i, v in enumerate(rating_counts.values):
-            plt.text(i, v + max(rating_counts.values) * 0.01, str(v), 
-                    ha='center', va='bottom', fontweight='bold')
-        
-        plt.grid(True, alpha=0.3, axis='y')
-        plt.tight_layout()
-        plt.savefig('bar_chart_content_by_rating.png', dpi=300, bbox_inches='tight')
+        draw_bar_chart(self.chart_data('bar_chart'), chart_path('bar_chart'))
         plt.show()
-        
+    
+    @traced
     def histogram(self):
         """Histogram: Display the shape and spread of a continuous dataset sample"""
         print("Creating Histogram: Release Year Distribution")
-        
-        plt.figure(figsize=(12, 6))
-        plt.hist(self.df['release_year'].dropna(), bins=30, alpha=0.7, edgecolor='black')
-        plt.title('Distribution of Netflix Content Release Years', fontsize=16, fontweight='bold')
-        plt.xlabel('Release Year', fontsize=12)
-        plt.ylabel('Frequency', fontsize=12)
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig('histogram_release_year_distribution.png', dpi=300, bbox_inches='tight')
+        renderer('histogram', self.is_binned())(self.chart_data('histogram'), chart_path('histogram'))
         plt.show()
-        
+    
+    @traced
     def scatter_plot(self):
         """Scatter Plot: Show correlation in a dataset"""
         print("Creating Scatter Plot: Release Year vs Year Added")
-        
-        # Prepare data
-        self.df['date_added'] = pd.to_datetime(self.df['date_added'], errors='coerce')
-        self.df['year_added'] = self.df['date_added'].dt.year
-        
-        # Filter out NaN values
-        plot_data = self.df.dropna(subset=['release_year', 'year_added'])
-        
-        plt.figure(figsize=(12, 6))
-        plt.scatter(plot_data['release_year'], plot_data['year_added'], 
-                   alpha=0.6, s=30, c=plot_data['type'].map({'Movie': 'blue', 'TV Show': 'red'}))
-        plt.title('Release Year vs Year Added to Netflix', fontsize=16, fontweight='bold')
-        plt.xlabel('Release Year', fontsize=12)
-        plt.ylabel('Year Added to Netflix', fontsize=12)
-        plt.grid(True, alpha=0.3)
-        
-        # Add legend
-        from matplotlib.lines import Line2D
-        legend_elements = [Line2D([0], [0], marker='o', color='w', 
-                                 markerfacecolor='blue', markersize=8, label='Movie'),
-                          Line2D([0], [0], marker='o', color='w', 
-                                 markerfacecolor='red', markersize=8, label='TV Show')]
-        plt.legend(handles=legend_elements)
-        
-        plt.tight_layout()
-        plt.savefig('scatter_plot_release_vs_added.png', dpi=300, bbox_inches='tight')
+        renderer('scatter_plot', self.is_binned())(self.chart_data('scatter_plot'), chart_path('scatter_plot'))
         plt.show()
-        
+    
+    @traced
     def pie_chart(self):
         """Pie Chart: Show the contribution of data point to a whole dataset"""
         print("Creating Pie Chart: Content Type Distribution")
-        
-        type_counts = self.df.groupby('type').size()
-        
-        plt.figure(figsize=(10, 8))
-        colors = ['#ff9999', '#66b3ff']
-        explode = (0.05, 0.05)
-        
-        plt.pie(type_counts.values, labels=type_counts.index, autopct='%1.1f%%',
-                startangle=90, colors=colors, explode=explode, shadow=True)
-        plt.title('Netflix Content Type Distribution', fontsize=16, fontweight='bold')
-        plt.axis('equal')
-        plt.tight_layout()
-        plt.savefig('pie_chart_content_type_distribution.png', dpi=300, bbox_inches='tight')
+        draw_pie_chart(self.chart_data('pie_chart'), chart_path('pie_chart'))
         plt.show()
-        
+    
+    @traced
     def heatmap(self):
         """Heat Map: Show magnitude of a phenomenon"""
         print("Creating Heatmap: Rating Distribution by Type")
-        
-        rating_by_type = self.df.groupby(['type', 'rating']).size().unstack(fill_value=0)
-        
-        plt.figure(figsize=(12, 6))
-        sns.heatmap(rating_by_type, annot=True, fmt='d', cmap='YlOrRd', cbar_kws={'label': 'Count'})
-        plt.title('Rating Distribution by Content Type', fontsize=16, fontweight='bold')
-        plt.xlabel('Rating', fontsize=12)
-        plt.ylabel('Content Type', fontsize=12)
-        plt.tight_layout()
-        plt.savefig('heatmap_rating_by_type.png', dpi=300, bbox_inches='tight')
+        draw_heatmap(self.chart_data('heatmap'), chart_path('heatmap'))
         plt.show()
-        
+    
+    @traced
     def box_plot(self):
         """Box Plot: Show distribution and outliers"""
         print("Creating Box Plot: Release Year by Content Type")
-        
-        plt.figure(figsize=(10, 6))
-        self.df.boxplot(column='release_year', by='type', figsize=(10, 6))
-        plt.title('Release Year Distribution by Content Type', fontsize=16, fontweight='bold')
-        plt.suptitle('')  # Remove default suptitle
-        plt.xlabel('Content Type', fontsize=12)
-        plt.ylabel('Release Year', fontsize=12)
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig('box_plot_release_year_by_type.png', dpi=300, bbox_inches='tight')
+        renderer('box_plot', self.is_binned())(self.chart_data('box_plot'), chart_path('box_plot'))
         plt.show()
-        
-    def create_all_visualizations(self):
-        """Create all visualizations"""
-        print("=== CREATING ALL DATA VISUALIZATIONS ===")
-        
+    
+    @traced
+    def render_all(self, output_dir='.', fmt='png', dpi=300, workers=None, charts=None, cache=None):
+        """Render charts headlessly in a process pool, one figure per worker task
+        
+        Chart inputs are aggregated up front in this process; workers only
+        draw and save; in binned mode every input is a table of counts.
+        With ``workers=1`` charts are drawn in this process instead.
+        With a ChartCache, charts whose input and style hash matches the
+        existing file are skipped. Returns chart name -> render time in
+        seconds (None for charts served from the cache).
+        """
+        plt.switch_backend('Agg')
+        charts = list(CHART_FILES) if charts is None else list(charts)
+        os.makedirs(output_dir, exist_ok=True)
+        
+        start = time.perf_counter()
+        inputs = {name: self.chart_data(name) for name in charts}
+        prepare_time = time.perf_counter() - start
+        
+        timings = {name: None for name in charts}
+        keys = {}
+        stale = charts
+        binned = self.is_binned()
+        if cache is not None:
+            for name in charts:
+                style = {'chart': name, 'format': fmt, 'dpi': dpi, 'style': PLOT_STYLE,
+                         'binned': binned and name in BINNED_RENDERERS}
+                keys[name] = content_key(inputs[name], style)
+            stale = [name for name in charts
+                     if not cache.is_fresh(chart_path(name, output_dir, fmt), keys[name])]
+        
+        if stale and workers == 1:
+            for name in stale:
+                record = render_chart(name, inputs[name], chart_path(name, output_dir, fmt), dpi, binned)
+                TRACER.spans.append(record)
+                timings[name] = record['duration_s']
+        elif stale:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker) as pool:
+                futures = {name: pool.submit(render_chart, name, inputs[name],
+                                             chart_path(name, output_dir, fmt), dpi, binned)
+                           for name in stale}
+                for name, future in futures.items():
+                    record = future.result()
+                    TRACER.spans.append(record)
+                    timings[name] = record['duration_s']
+        
+        if cache is not None:
+            for name in stale:
+                cache.record(chart_path(name, output_dir, fmt), keys[name])
+            cache.save()
+        total_time = time.perf_counter() - start
+        
+        print(f"Prepared chart inputs in {prepare_time:.3f}s")
+        for name, seconds in timings.items():
+            if seconds is None:
+                print(f"- {chart_path(name, output_dir, fmt)}: unchanged, served from cache")
+            else:
+                print(f"- {chart_path(name, output_dir, fmt)}: rendered in {seconds:.3f}s")
+        print(f"Rendered {len(stale)} of {len(charts)} charts in {total_time:.3f}s wall time")
+        
+        return timings
+    
+    @traced
+    def create_all_visualizations(self, charts=None):
+        """Create all visualizations, or only the named ``charts``"""
         if not self.load_data():
             return
         
         # Create all chart types
-        self.line_chart()
-        self.area_chart()
-        self.bar_chart()
-        self.histogram()
-        self.scatter_plot()
-        self.pie_chart()
-        self.heatmap()
-        self.box_plot()
+        for name in CHART_FILES if charts is None else charts:
+            getattr(self, name)()
         
-        print("\n=== ALL VISUALIZATIONS COMPLETED ===")
-        print("All charts have been saved as PNG files in the current directory.")
-        print("Generated files:")
-        print("- line_chart_content_over_time.png")
-        print("- area_chart_content_type_distribution.png")
-        print("- bar_chart_content_by_rating.png")
-        print("- histogram_release_year_distribution.png")
-        print("- scatter_plot_release_vs_added.png")
-        print("- pie_chart_content_type_distribution.png")
-        print("- heatmap_rating_by_type.png")
-        print("- box_plot_release_year_by_type.png")
+        logger.info("All charts have been saved as PNG files in the current directory: %s",
+                    ", ".join(chart_path(name) for name in (CHART_FILES if charts is None else charts)))
+
+def main(argv=None, prog=None):
+    """Run from command-line arguments; ``prog`` names the command in help output"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog=prog, description="Netflix data visualization")
+    parser.add_argument('--dataset', default="netflix_titles.csv",
+                        help="dataset path (.csv, .parquet or .feather)")
+    parser.add_argument('--charts', nargs='+', choices=list(CHART_FILES),
+                        help="draw only these charts (default: all)")
+    parser.add_argument('--batch', action='store_true',
+                        help="render headlessly in a process pool instead of showing each chart")
+    parser.add_argument('--output-dir', default='.', help="directory for batch-rendered charts")
+    parser.add_argument('--format', default='png', help="image format for batch rendering (png, svg, pdf, ...)")
+    parser.add_argument('--dpi', type=int, default=300, help="resolution for batch rendering")
+    parser.add_argument('--workers', type=int, help="render processes (default: CPU count)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-render every chart even if its input is unchanged")
+    parser.add_argument('--binned', dest='binned', action='store_true', default=None,
+                        help="draw the histogram, scatter and box plots from binned counts "
+                             f"(default: when the dataset has over {BINNED_ROW_THRESHOLD:,} rows)")
+    parser.add_argument('--no-binned', dest='binned', action='store_false',
+                        help="always draw those charts from the raw rows")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    visualizer = DataVisualizer(args.dataset, args.binned)
+    with session(args.trace, args.trace_format, args.profile, args.log_format, args.log_level):
+        if args.batch:
+            if visualizer.load_data():
+                cache = None if args.no_cache else ChartCache(os.path.join(args.output_dir, '.chart_cache.json'))
+                visualizer.render_all(args.output_dir, args.format, args.dpi, args.workers,
+                                      charts=args.charts, cache=cache)
+        else:
+            visualizer.create_all_visualizations(args.charts)
 
 if __name__ == "__main__":
-    visualizer = DataVisualizer()
-    visualizer.create_all_visualizations() 
\ No newline at end of file
+    main() 
\ No newline at end of file
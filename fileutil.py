@@ -0,0 +1,47 @@
+"""
+File helpers shared by the loading, caching and download modules
+Standard library only, so importing it never pulls in pandas or pyarrow
+"""
+
+import contextlib
+import hashlib
+import os
+import threading
+
+def file_hash(path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+@contextlib.contextmanager
+def atomic_path(path):
+    """Yield a temporary path that is renamed over ``path`` when the block succeeds
+
+    The temporary name carries the process and thread ids and keeps the
+    extension, so concurrent writers never share a file and format detection
+    still works.
+    Readers see either the old file or the complete new one. The parent
+    directory is created if needed; if the block raises, the temporary file
+    is removed and ``path`` is left as it was.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.{os.getpid()}-{threading.get_ident()}.tmp{ext}"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+@contextlib.contextmanager
+def atomic_write(path, mode='w'):
+    """Open ``path`` for writing through ``atomic_path``"""
+    with atomic_path(path) as tmp_path, open(tmp_path, mode) as f:
+        yield f
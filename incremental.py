@@ -0,0 +1,186 @@
+"""
+Incremental aggregation for append-only datasets
+Persists aggregate state and a high-water mark so each update only reads new rows
+"""
+
+import io
+import json
+import os
+import pandas as pd
+from compact import SHOW_ID_PATTERN
+from fileutil import atomic_write
+from storage import detect_format, read_rows_from
+from token_index import token_counts
+
+# Aggregate name -> group keys counted into it
+COUNT_KEYS = {
+    'type_counts': ['type'],
+    'rating_counts': ['rating'],
+    'yearly_content': ['release_year'],
+    'yearly_additions': ['year_added'],
+    'rating_by_type': ['type', 'rating'],
+}
+
+# Aggregate name -> comma-joined column whose tokens are counted into it
+TOKEN_KEYS = {
+    'country_counts': 'country',
+}
+
+# Aggregate name -> (group key, averaged column)
+MEAN_KEYS = {
+    'avg_year_by_type': ('type', 'release_year'),
+}
+
+def _show_number(show_ids):
+    """Return the numeric part of ``<prefix><N>`` show ids (NaN when they do not match)"""
+    return pd.to_numeric(show_ids.astype(str).str.extract(f"^{SHOW_ID_PATTERN}$")[1], errors='coerce')
+
+def _to_python(value):
+    """Convert numpy scalars to plain Python values for JSON"""
+    return value.item() if hasattr(value, 'item') else value
+
+class AggregateState:
+    """Aggregate counts, sums and a high-water mark for one dataset
+
+    Counts are kept per group key, means as per-group sums and counts, so
+    merging new rows never needs the rows already processed.
+    """
+
+    def __init__(self):
+        self.counts = {name: {} for name in list(COUNT_KEYS) + list(TOKEN_KEYS)}
+        self.sums = {name: {} for name in MEAN_KEYS}
+        self.totals = {name: {} for name in MEAN_KEYS}
+        self.columns = None
+        self.rows_seen = 0
+        self.byte_offset = 0
+        self.max_show_id = None
+        self.max_date_added = None
+
+    @classmethod
+    def load(cls, path):
+        """Load state from ``path``, or return a fresh state if it does not exist"""
+        state = cls()
+        if not os.path.exists(path):
+            return state
+        with open(path) as f:
+            data = json.load(f)
+        for kind in ['counts', 'sums', 'totals']:
+            setattr(state, kind, {name: {_key(k): v for k, v in pairs}
+                                  for name, pairs in data[kind].items()})
+        for field in ['columns', 'rows_seen', 'byte_offset', 'max_show_id', 'max_date_added']:
+            setattr(state, field, data[field])
+        return state
+
+    def save(self, path):
+        """Write state to ``path`` as JSON; an interrupted save keeps the previous state"""
+        data = {kind: {name: [[list(k) if isinstance(k, tuple) else k, v] for k, v in table.items()]
+                       for name, table in getattr(self, kind).items()}
+                for kind in ['counts', 'sums', 'totals']}
+        for field in ['columns', 'rows_seen', 'byte_offset', 'max_show_id', 'max_date_added']:
+            data[field] = getattr(self, field)
+        with atomic_write(path) as f:
+            json.dump(data, f)
+
+    def advance(self, position):
+        """Record the read position returned by ``read_appended``"""
+        for field, value in position.items():
+            setattr(self, field, value)
+
+    def update(self, df):
+        """Merge a cleaned frame of new rows into the state"""
+        for name, keys in COUNT_KEYS.items():
+            if not all(key in df.columns for key in keys):
+                continue
+            table = self.counts[name]
+            for key, n in df.groupby(keys, observed=True).size().items():
+                key = _to_python(key) if len(keys) == 1 else tuple(_to_python(k) for k in key)
+                table[key] = table.get(key, 0) + int(n)
+
+        for name, column in TOKEN_KEYS.items():
+            if column not in df.columns:
+                continue
+            table = self.counts[name]
+            for key, n in token_counts(df[column]).items():
+                table[key] = table.get(key, 0) + int(n)
+
+        for name, (key_col, column) in MEAN_KEYS.items():
+            grouped = df.groupby(key_col, observed=True)[column].agg(['sum', 'count'])
+            for key, row in grouped.iterrows():
+                key = _to_python(key)
+                self.sums[name][key] = self.sums[name].get(key, 0) + _to_python(row['sum'])
+                self.totals[name][key] = self.totals[name].get(key, 0) + int(row['count'])
+
+        if 'show_id' in df.columns and len(df):
+            numbers = _show_number(df['show_id'])
+            if numbers.notna().any():
+                self.max_show_id = max(self.max_show_id or 0, int(numbers.max()))
+        if 'date_added' in df.columns and df['date_added'].notna().any():
+            latest = df['date_added'].max().isoformat()
+            self.max_date_added = max(self.max_date_added or latest, latest)
+
+    def _series(self, name):
+        keys = COUNT_KEYS[name] if name in COUNT_KEYS else [TOKEN_KEYS[name]]
+        table = self.counts[name]
+        if len(keys) == 1:
+            index = pd.Index(list(table), name=keys[0])
+        else:
+            index = pd.MultiIndex.from_tuples(list(table), names=keys)
+        return pd.Series(list(table.values()), index=index, dtype='int64').sort_index()
+
+    def aggregates(self):
+        """Return the aggregates in the shape DataAnalyzer produces them"""
+        key_col, column = MEAN_KEYS['avg_year_by_type']
+        sums = pd.Series(self.sums['avg_year_by_type'], dtype='float64')
+        totals = pd.Series(self.totals['avg_year_by_type'], dtype='float64')
+        avg_year_by_type = (sums / totals).rename(column).rename_axis(key_col).sort_index()
+
+        return {
+            'type_counts': self._series('type_counts'),
+            'rating_counts': self._series('rating_counts').sort_values(ascending=False),
+            'yearly_content': self._series('yearly_content'),
+            'country_counts': self._series('country_counts').sort_values(ascending=False).head(10),
+            'yearly_additions': self._series('yearly_additions'),
+            'rating_by_type': self._series('rating_by_type').unstack(fill_value=0),
+            'avg_year_by_type': avg_year_by_type,
+        }
+
+def _key(value):
+    """Restore a JSON group key, turning lists back into tuples"""
+    return tuple(value) if isinstance(value, list) else value
+
+def read_appended(path, state, columns=None):
+    """Read the rows appended to ``path`` since the state was last updated
+
+    CSV files are read from the byte offset where the previous update
+    stopped, up to the last complete line; Parquet and Feather files skip
+    the rows already seen. Every appended row is returned, whatever its
+    ``show_id``. Returns the new rows and the position to pass to
+    ``AggregateState.advance`` once they are merged.
+    """
+    fmt = detect_format(path)
+    if fmt == 'csv':
+        size = os.path.getsize(path)
+        if size < state.byte_offset:
+            raise ValueError(f"{path} is smaller than when it was last processed; "
+                             "it is not append-only, rebuild the state from scratch")
+        with open(path, 'rb') as f:
+            if state.byte_offset == 0:
+                header = list(pd.read_csv(f, nrows=0).columns)
+                f.seek(0)
+                f.readline()
+            else:
+                header = state.columns
+                f.seek(state.byte_offset)
+            start = f.tell()
+            data = f.read(size - start)
+        # Leave a partially written last line for the next update
+        end = data.rfind(b'\n') + 1
+        if end:
+            df = pd.read_csv(io.BytesIO(data[:end]), header=None, names=header, usecols=columns)
+        else:
+            df = pd.DataFrame(columns=columns or header)
+        position = {'byte_offset': start + end, 'columns': header, 'rows_seen': state.rows_seen + len(df)}
+    else:
+        df = read_rows_from(path, state.rows_seen, columns=columns)
+        position = {'columns': list(df.columns), 'rows_seen': state.rows_seen + len(df)}
+    return df, position
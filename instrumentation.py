@@ -0,0 +1,226 @@
+"""
+Stage instrumentation for the analysis and visualization pipeline
+Records a span per stage (duration, rows in and out, peak memory), exports the
+spans as JSON or Chrome trace events, logs stage progress and can run a
+sampling profiler alongside
+"""
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Environment variables that switch tracing and profiling on without flags
+TRACE_ENV = 'NETFLIX_TRACE'
+PROFILE_ENV = 'NETFLIX_PROFILE'
+
+TRACE_FORMATS = ['chrome', 'json']
+
+def _peak_rss_kb():
+    """Return the process's peak resident set size in KB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+class Tracer:
+    """Collects finished spans for the current process"""
+
+    def __init__(self):
+        self.spans = []
+        self.origin = time.time()
+
+    def add(self, name, start, duration, **fields):
+        """Record a span that was measured elsewhere, e.g. in a worker process"""
+        record = {'name': name, 'start': start, 'duration_s': duration,
+                  'pid': os.getpid(), 'tid': threading.get_ident()}
+        record.update(fields)
+        self.spans.append(record)
+        return record
+
+    @contextlib.contextmanager
+    def span(self, name, rows_in=None, level=logging.INFO, **fields):
+        """Time a block, logging its start and end and recording it as a span
+
+        Yields a dict; set ``rows_out`` (or other fields) on it inside the
+        block. Steps inside a stage log at DEBUG so only stages show by default.
+        """
+        logger.log(level, "%s started", name)
+        extra = dict(fields)
+        peak_before = _peak_rss_kb()
+        start = time.time()
+        perf_start = time.perf_counter()
+        try:
+            yield extra
+        finally:
+            duration = time.perf_counter() - perf_start
+            peak = _peak_rss_kb()
+            record = self.add(name, start, duration, rows_in=rows_in, peak_rss_kb=peak,
+                              peak_rss_growth_kb=peak - peak_before, **extra)
+            rows = f", rows {rows_in} -> {record['rows_out']}" if record.get('rows_out') is not None else ''
+            logger.log(level, "%s finished in %.3fs%s, peak RSS %.1f MB", name, duration, rows, peak / 1024,
+                       extra={'span': record})
+
+    def clear(self):
+        """Forget every recorded span"""
+        self.spans = []
+        self.origin = time.time()
+
+    def to_json(self, path):
+        """Write the spans as a JSON list"""
+        with open(path, 'w') as f:
+            json.dump(self.spans, f, indent=2, default=str)
+
+    def to_chrome_trace(self, path):
+        """Write the spans in Chrome trace event format (chrome://tracing, Perfetto)"""
+        events = []
+        for record in self.spans:
+            args = {k: v for k, v in record.items() if k not in ('name', 'start', 'duration_s', 'pid', 'tid')}
+            events.append({
+                'name': record['name'],
+                'ph': 'X',
+                'ts': (record['start'] - self.origin) * 1e6,
+                'dur': record['duration_s'] * 1e6,
+                'pid': record['pid'],
+                'tid': record['tid'],
+                'args': args,
+            })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+
+    def save(self, path, fmt='chrome'):
+        """Write the spans as ``'chrome'`` trace events or a ``'json'`` span list"""
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format '{fmt}'. Expected one of: {', '.join(TRACE_FORMATS)}")
+        if fmt == 'chrome':
+            self.to_chrome_trace(path)
+        else:
+            self.to_json(path)
+
+# Process-wide tracer used by ``traced`` and ``span``
+TRACER = Tracer()
+
+def span(name, rows_in=None, level=logging.INFO, **fields):
+    """Time a block on the process-wide tracer"""
+    return TRACER.span(name, rows_in, level, **fields)
+
+def _frame_rows(obj):
+    df = getattr(obj, 'df', None)
+    return len(df) if df is not None else None
+
+def traced(method):
+    """Wrap a stage method in a span named ``Class.method``
+
+    Rows in and out are taken from the instance's ``df`` before and after
+    the call.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with span(f"{type(self).__name__}.{method.__name__}", _frame_rows(self)) as fields:
+            result = method(self, *args, **kwargs)
+            fields['rows_out'] = _frame_rows(self)
+            return result
+    return wrapper
+
+class SamplingProfiler:
+    """Samples one thread's Python stack on a fixed interval from a background thread
+
+    Samples are written as collapsed stacks (``outer;inner count`` per line),
+    the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+
+    def start(self, thread_id=None):
+        """Start sampling ``thread_id`` (the calling thread by default)"""
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def save(self, path):
+        """Write the samples as collapsed stacks, most frequent first"""
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as one JSON object per line, including span fields"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if hasattr(record, 'span'):
+            data['span'] = record.span
+        return json.dumps(data, default=str)
+
+def configure_logging(fmt='text', level=logging.INFO):
+    """Send pipeline logs to stderr as plain text or JSON lines"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == 'json'
+                         else logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+def add_arguments(parser):
+    """Add the tracing, profiling and logging flags shared by the scripts"""
+    parser.add_argument('--trace', default=os.environ.get(TRACE_ENV),
+                        help=f"write stage spans to this file (or set {TRACE_ENV})")
+    parser.add_argument('--trace-format', default='chrome', choices=TRACE_FORMATS,
+                        help="span file format: Chrome trace events or a JSON span list")
+    parser.add_argument('--profile', default=os.environ.get(PROFILE_ENV),
+                        help=f"run a sampling profiler and write collapsed stacks here (or set {PROFILE_ENV})")
+    parser.add_argument('--log-format', default='text', choices=['text', 'json'],
+                        help="stage log output format")
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING'],
+                        help="DEBUG also logs the steps inside each stage (reads, date parsing, groupbys)")
+
+@contextlib.contextmanager
+def session(trace=None, trace_format='chrome', profile=None, log_format='text', log_level='INFO'):
+    """Configure logging, optionally profile, and write the trace when the block ends"""
+    configure_logging(log_format, log_level)
+    profiler = SamplingProfiler().start() if profile else None
+    try:
+        yield TRACER
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            profiler.save(profile)
+            logger.info("Profile written to %s", profile)
+        if trace:
+            TRACER.save(trace, trace_format)
+            logger.info("Trace written to %s", trace)
@@ -0,0 +1,170 @@
+"""
+Multi-core group aggregation for the analysis stages
+Group keys are encoded as integer codes and shared with a process pool through
+shared memory; each worker counts and sums one row partition with bincount and
+the partial results are merged with a tree reduction
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+# Partitions smaller than this are not worth a round trip to a worker
+MIN_PARTITION_ROWS = 250_000
+
+def encode_keys(df, keys):
+    """Encode the group keys of every row as one integer code
+
+    Returns the codes (-1 where any key is missing, as groupby drops those
+    rows), the sorted uniques of each key and the shape the combined codes
+    unravel to.
+    """
+    codes, uniques = [], []
+    for key in keys:
+        key_codes, key_uniques = pd.factorize(df[key], sort=True)
+        codes.append(key_codes)
+        uniques.append(key_uniques)
+    shape = tuple(max(len(u), 1) for u in uniques)
+    missing = np.logical_or.reduce([c < 0 for c in codes])
+    combined = np.ravel_multi_index([np.where(missing, 0, c) for c in codes], shape).astype(np.int64)
+    combined[missing] = -1
+    return combined, uniques, shape
+
+def group_index(keys, uniques, shape, groups):
+    """Build the groupby result index for combined group codes"""
+    positions = np.unravel_index(groups, shape)
+    levels = [key_uniques.take(pos).rename(key) for key, key_uniques, pos in zip(keys, uniques, positions)]
+    return levels[0] if len(levels) == 1 else pd.MultiIndex.from_arrays(levels)
+
+def partial_sums(arrays, n_groups):
+    """Count rows and sum each value column per group code
+
+    ``arrays`` holds the ``codes`` array and one float array per value
+    column; missing values are left out of that column's sum and count.
+    """
+    codes = arrays['codes']
+    valid = codes >= 0
+    result = {'size': np.bincount(codes[valid], minlength=n_groups)}
+    for name, values in arrays.items():
+        if name == 'codes':
+            continue
+        present = valid & ~np.isnan(values)
+        result[(name, 'sum')] = np.bincount(codes[present], weights=values[present], minlength=n_groups)
+        result[(name, 'count')] = np.bincount(codes[present], minlength=n_groups)
+    return result
+
+def add_partials(a, b):
+    """Merge two partial results"""
+    return {name: a[name] + b[name] for name in a}
+
+def tree_reduce(parts, combine):
+    """Combine partial results pairwise, level by level, until one is left"""
+    parts = list(parts)
+    while len(parts) > 1:
+        merged = [combine(a, b) for a, b in zip(parts[0::2], parts[1::2])]
+        if len(parts) % 2:
+            merged.append(parts[-1])
+        parts = merged
+    return parts[0]
+
+class SharedArrays:
+    """NumPy arrays copied once into named shared memory blocks
+
+    Workers attach to the blocks by name, so row partitions are never
+    pickled. Use as a context manager; the blocks are unlinked on exit.
+    """
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.specs = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+def _partition_sums(specs, n_groups, start, stop):
+    """Worker task: attach to the shared arrays and aggregate rows ``start:stop``"""
+    blocks = {name: shared_memory.SharedMemory(name=spec[0]) for name, spec in specs.items()}
+    try:
+        arrays = {name: np.ndarray(shape, dtype, buffer=blocks[name].buf)[start:stop]
+                  for name, (_, shape, dtype) in specs.items()}
+        result = partial_sums(arrays, n_groups)
+        # Views into the blocks must be released before they can be closed
+        del arrays
+        return result
+    finally:
+        for block in blocks.values():
+            block.close()
+
+class ParallelGroupBy:
+    """Group sizes and means computed over row partitions in a process pool
+
+    Results match ``df.groupby(keys, observed=True)`` exactly for counts;
+    means are per-group sums over counts. ``workers`` defaults to the CPU
+    count; the pool is started on first use and kept until ``close``.
+    """
+
+    def __init__(self, workers=None, min_partition_rows=MIN_PARTITION_ROWS):
+        self.workers = workers or os.cpu_count()
+        self.min_partition_rows = min_partition_rows
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def partitions(self, n_rows):
+        """Return the row boundaries of the partitions for ``n_rows`` rows"""
+        n_parts = max(1, min(self.workers, n_rows // self.min_partition_rows))
+        return np.linspace(0, n_rows, n_parts + 1).astype(np.int64)
+
+    def aggregate(self, df, keys, columns=()):
+        """Return the group sizes and a frame of group means of ``columns``"""
+        keys = list(keys)
+        codes, uniques, shape = encode_keys(df, keys)
+        n_groups = int(np.prod(shape))
+        arrays = {'codes': codes}
+        for col in columns:
+            arrays[col] = pd.to_numeric(df[col]).to_numpy(dtype='float64', na_value=np.nan)
+
+        bounds = self.partitions(len(df))
+        if len(bounds) == 2:
+            parts = [partial_sums(arrays, n_groups)]
+        else:
+            with SharedArrays(arrays) as shared:
+                futures = [self._executor().submit(_partition_sums, shared.specs, n_groups, start, stop)
+                           for start, stop in zip(bounds[:-1], bounds[1:])]
+                parts = [future.result() for future in futures]
+        total = tree_reduce(parts, add_partials)
+
+        groups = np.flatnonzero(total['size'])
+        index = group_index(keys, uniques, shape, groups)
+        sizes = pd.Series(total['size'][groups].astype('int64'), index=index)
+        means = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for col in columns:
+                mean = total[(col, 'sum')][groups] / total[(col, 'count')][groups]
+                # Nullable integer columns average to nullable floats, as in pandas
+                dtype = 'Float64' if pd.api.types.is_extension_array_dtype(df[col].dtype) else 'float64'
+                means[col] = pd.Series(mean, index=index).astype(dtype)
+        return sizes, pd.DataFrame(means, index=index)
+
+    def close(self):
+        """Shut the worker pool down"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
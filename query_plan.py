@@ -0,0 +1,148 @@
+"""
+Shared query planning for the analysis and visualization stages
+Consumers declare the filters, group counts and group means they need; each
+distinct one is computed once per frame and the cached result is handed to
+every consumer.
+"""
+
+from token_index import token_counts, token_mask
+
+def _as_keys(keys):
+    """Normalize a group key or list of keys to a tuple"""
+    return (keys,) if isinstance(keys, str) else tuple(keys)
+
+class QueryPlan:
+    """Declared filters, group counts and group means, de-duplicated"""
+
+    def __init__(self):
+        self.filters = {}
+        self.token_filters = {}
+        self.counts = []
+        self.token_counts = []
+        self.means = []
+
+    def filter(self, name, predicate):
+        """Declare a boolean mask ``predicate(df)`` under ``name``"""
+        if name in self.filters and self.filters[name] is not predicate:
+            raise ValueError(f"Filter '{name}' is already declared with a different predicate")
+        self.filters[name] = predicate
+        return self
+
+    def token_filter(self, name, column, token):
+        """Declare a membership filter: rows whose comma-joined ``column`` contains ``token``"""
+        if self.token_filters.get(name, (column, token)) != (column, token):
+            raise ValueError(f"Filter '{name}' is already declared with a different token")
+        self.token_filters[name] = (column, token)
+        return self
+
+    def count(self, keys):
+        """Declare the group sizes ``df.groupby(keys).size()``"""
+        keys = _as_keys(keys)
+        if keys not in self.counts:
+            self.counts.append(keys)
+        return self
+
+    def token_count(self, column):
+        """Declare per-token row counts of a comma-joined column"""
+        if column not in self.token_counts:
+            self.token_counts.append(column)
+        return self
+
+    def mean(self, keys, column):
+        """Declare the group means ``df.groupby(keys)[column].mean()``"""
+        entry = (_as_keys(keys), column)
+        if entry not in self.means:
+            self.means.append(entry)
+        return self
+
+    def merge(self, other):
+        """Add every declaration of another plan to this one"""
+        for name, predicate in other.filters.items():
+            self.filter(name, predicate)
+        for name, (column, token) in other.token_filters.items():
+            self.token_filter(name, column, token)
+        for keys in other.counts:
+            self.count(keys)
+        for column in other.token_counts:
+            self.token_count(column)
+        for keys, column in other.means:
+            self.mean(keys, column)
+        return self
+
+    def group_keys(self):
+        """Return the distinct group keys across counts and means"""
+        keys = list(self.counts)
+        for entry, _ in self.means:
+            if entry not in keys:
+                keys.append(entry)
+        return keys
+
+    def execute(self, df, index=None, engine=None):
+        """Evaluate the plan against ``df``
+
+        A TokenIndex serves the token filters and counts when given, and a
+        ParallelGroupBy engine computes the group sizes and means.
+        """
+        return PlanResults(self, df, index, engine)
+
+class PlanResults:
+    """Results of a QueryPlan on one frame
+
+    Every distinct filter mask and group-by is evaluated once; group sizes
+    and means over the same keys share a single groupby. Token filters and
+    counts come from the TokenIndex postings when an index is given, and
+    groupbys are partitioned over a process pool when an engine is given.
+    """
+
+    def __init__(self, plan, df, index=None, engine=None):
+        self.plan = plan
+        self.df = df
+        self._masks = {name: predicate(df) for name, predicate in plan.filters.items()}
+        for name, (column, token) in plan.token_filters.items():
+            if index is not None and column in index.postings:
+                self._masks[name] = index.mask(column, token, df.index)
+            else:
+                self._masks[name] = token_mask(df[column], token)
+        self._rows = {}
+        self._counts = {}
+        self._means = {}
+        self._token_counts = {
+            column: index.counts(column) if index is not None and column in index.postings
+            else token_counts(df[column])
+            for column in plan.token_counts
+        }
+
+        for keys in plan.group_keys():
+            columns = [column for entry, column in plan.means if entry == keys]
+            if engine is not None:
+                sizes, means = engine.aggregate(df, keys, columns)
+            else:
+                grouped = df.groupby(list(keys), observed=True)
+                sizes = grouped.size() if keys in plan.counts else None
+                means = grouped[columns].mean() if columns else None
+            if keys in plan.counts:
+                self._counts[keys] = sizes
+            for column in columns:
+                self._means[(keys, column)] = means[column]
+
+    def mask(self, name):
+        """Return the boolean mask of a declared filter"""
+        return self._masks[name]
+
+    def rows(self, name):
+        """Return the rows selected by a declared filter"""
+        if name not in self._rows:
+            self._rows[name] = self.df[self._masks[name]]
+        return self._rows[name]
+
+    def count(self, keys):
+        """Return the group sizes for declared keys"""
+        return self._counts[_as_keys(keys)]
+
+    def token_count(self, column):
+        """Return the per-token row counts of a declared column"""
+        return self._token_counts[column]
+
+    def mean(self, keys, column):
+        """Return the group means of ``column`` for declared keys"""
+        return self._means[(_as_keys(keys), column)]
@@ -0,0 +1,234 @@
+"""
+Storage layer for the Netflix dataset
+Reads and writes CSV, Parquet and Feather files behind one interface
+"""
+
+import logging
+import os
+import pandas as pd
+from instrumentation import span
+
+# File extension -> storage format
+FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+}
+
+# Default extension for each storage format
+EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+DATE_FORMAT = '%B %d, %Y'
+
+# Columns stored with a real type in the columnar formats
+TIMESTAMP_COLUMNS = ['date_added']
+DICTIONARY_COLUMNS = ['type', 'rating', 'country']
+
+def detect_format(path):
+    """Return the storage format for a path based on its extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported file format '{ext}' for {path}. "
+                         f"Expected one of: {', '.join(sorted(FORMATS))}")
+    return FORMATS[ext]
+
+def with_format(path, fmt):
+    """Return ``path`` with its extension replaced to match ``fmt``"""
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unsupported storage format '{fmt}'. "
+                         f"Expected one of: {', '.join(EXTENSIONS)}")
+    return os.path.splitext(path)[0] + EXTENSIONS[fmt]
+
+def to_columnar(df):
+    """Convert dataset columns to the typed representation used by Parquet/Feather
+
+    ``date_added`` becomes a timestamp and the low-cardinality columns become
+    categoricals, which Arrow stores dictionary-encoded.
+    """
+    df = df.copy()
+    for col in TIMESTAMP_COLUMNS:
+        if col not in df.columns or pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        if pd.api.types.is_string_dtype(df[col]) or pd.api.types.is_object_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col].str.strip(), format=DATE_FORMAT, errors='coerce')
+        else:
+            # Every value missing, so the column was read as float64
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in DICTIONARY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+def table_columns(path):
+    """Return the column names of a table without reading its rows"""
+    fmt = detect_format(path)
+    if fmt == 'csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    import pyarrow as pa
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    return pa.ipc.open_file(pa.memory_map(path)).schema.names
+
+def read_table(path, columns=None, dtype=None):
+    """Read a table, loading only ``columns`` when given
+
+    ``dtype`` is applied while parsing CSV files; columnar formats keep
+    their stored types.
+    """
+    fmt = detect_format(path)
+    with span('read_table', level=logging.DEBUG, path=path, format=fmt) as fields:
+        if fmt == 'csv':
+            df = pd.read_csv(path, usecols=columns, dtype=dtype)
+        elif fmt == 'parquet':
+            df = pd.read_parquet(path, columns=columns)
+        else:
+            df = pd.read_feather(path, columns=columns)
+        fields['rows_out'] = len(df)
+    return df
+
+def iter_table(path, chunk_size, columns=None):
+    """Yield a table as DataFrames of at most ``chunk_size`` rows
+
+    Only one chunk is held in memory at a time.
+    """
+    fmt = detect_format(path)
+    if fmt == 'csv':
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+        return
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='parquet' if fmt == 'parquet' else 'feather')
+    for batch in dataset.to_batches(columns=columns, batch_size=chunk_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+def read_rows_from(path, start, columns=None):
+    """Read a Parquet or Feather table from row ``start`` to the end
+
+    Parquet row groups and Feather record batches that end before ``start``
+    are skipped without being read.
+    """
+    import pyarrow as pa
+
+    fmt = detect_format(path)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        source = pq.ParquetFile(path)
+        parts = [(source.metadata.row_group(i).num_rows,
+                  lambda i=i: source.read_row_group(i, columns=columns))
+                 for i in range(source.num_row_groups)]
+        schema = source.schema_arrow
+    elif fmt == 'feather':
+        source = pa.ipc.open_file(pa.memory_map(path))
+        parts = [(source.get_batch(i).num_rows,
+                  lambda i=i: pa.Table.from_batches([source.get_batch(i)]))
+                 for i in range(source.num_record_batches)]
+        schema = source.schema
+    else:
+        raise ValueError(f"read_rows_from does not support {fmt} files")
+
+    tables = []
+    offset = 0
+    for num_rows, read in parts:
+        if offset + num_rows > start:
+            table = read().slice(max(0, start - offset))
+            tables.append(table.select(columns) if columns is not None and fmt == 'feather' else table)
+        offset += num_rows
+    if not tables:
+        empty = schema.empty_table()
+        return (empty.select(columns) if columns is not None else empty).to_pandas()
+    return pa.concat_tables(tables).to_pandas()
+
+def write_table(data, path, index=False):
+    """Write a DataFrame or Series in the format implied by ``path``
+
+    Series (aggregates) are written with their index, like ``Series.to_csv``.
+    """
+    fmt = detect_format(path)
+    if isinstance(data, pd.Series):
+        data = data.to_frame(name=data.name if data.name is not None else 'count')
+        index = True
+    if fmt == 'csv':
+        data.to_csv(path, index=index)
+        return
+    data = to_columnar(data)
+    if fmt == 'parquet':
+        data.to_parquet(path, index=index)
+    else:
+        # Feather cannot store an index, so keep it as regular columns
+        data = data.reset_index() if index else data.reset_index(drop=True)
+        data.to_feather(path)
+
+class TableWriter:
+    """Append DataFrame chunks to a single CSV, Parquet or Feather file
+
+    Use as a context manager; every chunk must have the same columns.
+    Chunks may carry different categories in their dictionary columns.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = detect_format(path)
+        self.schema = None
+        self.categories = {}
+        self._writer = None
+        self._rows = 0
+
+    def _extend_categories(self, df):
+        """Give each categorical the union of the categories written so far
+
+        The Feather (IPC file) format cannot replace a dictionary, only
+        append to it, so every chunk's categories must extend the previous
+        chunk's as a prefix; new values are written as dictionary deltas.
+        """
+        for col in df.columns:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                continue
+            seen = self.categories.get(col)
+            if seen is None:
+                seen = df[col].cat.categories
+            else:
+                seen = seen.append(df[col].cat.categories.difference(seen, sort=False))
+            self.categories[col] = seen
+            df[col] = df[col].cat.set_categories(seen)
+        return df
+
+    def write(self, df):
+        """Append one chunk"""
+        if self.format == 'csv':
+            df.to_csv(self.path, mode='w' if self._rows == 0 else 'a',
+                      header=(self._rows == 0), index=False)
+        else:
+            import pyarrow as pa
+
+            df = to_columnar(df)
+            if self.format == 'feather':
+                df = self._extend_categories(df)
+            table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+            if self._writer is None:
+                self.schema = table.schema
+                if self.format == 'parquet':
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.path, self.schema)
+                else:
+                    options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+                    self._writer = pa.ipc.new_file(self.path, self.schema, options=options)
+            self._writer.write_table(table)
+        self._rows += len(df)
+
+    def close(self):
+        """Flush and close the underlying file"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,145 @@
+"""
+Streaming aggregation for datasets larger than memory
+Incremental aggregators that consume chunks and merge their partial results
+"""
+
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from token_index import token_counts
+
+def _merge(total, part):
+    """Add a partial grouped result onto the running total"""
+    if total is None:
+        return part
+    levels = list(range(part.index.nlevels))
+    return pd.concat([total, part]).groupby(level=levels).sum()
+
+class _GroupedAggregator(ABC):
+    """Base class tracking the key dtypes seen across chunks"""
+
+    def __init__(self, keys):
+        self.keys = [keys] if isinstance(keys, str) else list(keys)
+        self.dtypes = {}
+        self.sorted_categories = {}
+        self.total = None
+
+    def _track_dtypes(self, chunk):
+        for key in self.keys:
+            dtype = chunk[key].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                self.sorted_categories[key] = (self.sorted_categories.get(key, True)
+                                               and dtype.categories.is_monotonic_increasing)
+                # Union of the chunks' categories in first-seen order, as a
+                # single read of the whole file combines stored dictionaries
+                if key in self.dtypes:
+                    dtype = union_categoricals([pd.Categorical([], dtype=self.dtypes[key]),
+                                                pd.Categorical([], dtype=dtype)]).dtype
+                self.dtypes[key] = dtype
+            elif key in self.dtypes:
+                self.dtypes[key] = np.result_type(self.dtypes[key], dtype)
+            else:
+                self.dtypes[key] = dtype
+
+    @abstractmethod
+    def _partial(self, chunk):
+        """Return the grouped partial result of one chunk"""
+
+    def update(self, chunk):
+        """Fold one chunk into the running result"""
+        self._track_dtypes(chunk)
+        self.total = _merge(self.total, self._partial(chunk))
+
+    def _restore_index(self, result):
+        """Rebuild the group index with the dtypes the in-memory groupby produces"""
+        levels = []
+        for i, name in enumerate(self.keys):
+            values = result.index.get_level_values(i)
+            dtype = self.dtypes[name]
+            if isinstance(dtype, pd.CategoricalDtype):
+                if self.sorted_categories[name]:
+                    # Categories inferred from values (CSV chunks) come out sorted,
+                    # and so do those inferred from the whole column in memory
+                    dtype = pd.CategoricalDtype(dtype.categories.sort_values(), dtype.ordered)
+                levels.append(pd.CategoricalIndex(values, dtype=dtype, name=name))
+            else:
+                levels.append(pd.Index(values.astype(self.dtypes[name]), name=name))
+        result.index = levels[0] if len(levels) == 1 else pd.MultiIndex.from_arrays(levels)
+        return result.sort_index()
+
+class CountAggregator(_GroupedAggregator):
+    """Group sizes, equivalent to ``df.groupby(keys).size()``"""
+
+    def _partial(self, chunk):
+        return chunk.groupby(self.keys, observed=True).size()
+
+    def result(self):
+        """Return the merged group sizes"""
+        if self.total is None:
+            return pd.Series(dtype='int64')
+        return self._restore_index(self.total.astype('int64'))
+
+class MeanAggregator(_GroupedAggregator):
+    """Group means, equivalent to ``df.groupby(keys)[column].mean()``
+
+    Keeps per-group sums and counts so partial results merge exactly.
+    """
+
+    def __init__(self, keys, column):
+        super().__init__(keys)
+        self.column = column
+
+    def _partial(self, chunk):
+        return chunk.groupby(self.keys, observed=True)[self.column].agg(['sum', 'count'])
+
+    def result(self):
+        """Return the merged group means"""
+        if self.total is None:
+            return pd.Series(dtype='float64', name=self.column)
+        means = self.total['sum'] / self.total['count']
+        return self._restore_index(means.rename(self.column))
+
+class TokenCountAggregator:
+    """Per-token row counts of a comma-joined column, equivalent to ``token_counts``"""
+
+    def __init__(self, column):
+        self.column = column
+        self.total = None
+
+    def update(self, chunk):
+        """Fold one chunk into the running counts"""
+        self.total = _merge(self.total, token_counts(chunk[self.column]))
+
+    def result(self):
+        """Return the merged token counts"""
+        if self.total is None:
+            return pd.Series(dtype='int64')
+        return self.total.astype('int64').rename_axis(self.column).sort_index()
+
+class FilterCountAggregator:
+    """Number of rows matching a predicate that returns a boolean mask"""
+
+    def __init__(self, predicate):
+        self.predicate = predicate
+        self.count = 0
+
+    def update(self, chunk):
+        """Fold one chunk into the running count"""
+        self.count += int(self.predicate(chunk).sum())
+
+    def result(self):
+        """Return the merged count"""
+        return self.count
+
+def run_aggregators(chunks, aggregators, transform=None):
+    """Feed every chunk through ``transform`` and into each aggregator
+
+    ``aggregators`` is a dict of name -> aggregator; returns name -> result.
+    """
+    for chunk in chunks:
+        if transform is not None:
+            chunk = transform(chunk)
+        for aggregator in aggregators.values():
+            aggregator.update(chunk)
+    return {name: aggregator.result() for name, aggregator in aggregators.items()}
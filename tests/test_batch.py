@@ -0,0 +1,64 @@
+"""
+Batch jobs must never share an output directory, and the stages after
+loading reuse the staged clean cache and source hash
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+import cleaning
+import data_analysis
+from batch import analyze_dataset, load_dataset, make_jobs, render_dataset
+from cleaning import cache_path, clean_frame
+from create_sample_data import REFERENCE_DATE, generate_netflix_chunk
+from fileutil import file_hash
+from storage import read_table
+
+def test_same_file_name_from_different_directories():
+    jobs = make_jobs(['regionA/netflix_titles.csv', {'dataset': 'regionB/netflix_titles.csv'}], 'rep')
+    assert [job['output_dir'] for job in jobs] == [os.path.join('rep', 'netflix_titles'),
+                                                   os.path.join('rep', 'netflix_titles-2')]
+
+def test_generated_names_skip_explicit_directories():
+    jobs = make_jobs(['y/a.csv', {'dataset': 'x/a.csv', 'output_dir': os.path.join('rep', 'a')}], 'rep')
+    assert [job['output_dir'] for job in jobs] == [os.path.join('rep', 'a-2'), os.path.join('rep', 'a')]
+
+def test_duplicate_explicit_directories_are_rejected():
+    with pytest.raises(ValueError):
+        make_jobs([{'dataset': 'a.csv', 'output_dir': 'rep/x'}, {'dataset': 'b.csv', 'output_dir': 'rep/x/'}])
+
+@pytest.fixture
+def dataset(tmp_path):
+    rng = np.random.default_rng(3)
+    path = str(tmp_path / 'netflix.csv')
+    generate_netflix_chunk(rng, 0, 2_000, REFERENCE_DATE).to_csv(path, index=False)
+    return path
+
+def test_load_stage_stages_the_clean_cache(dataset):
+    digest, cached = load_dataset({'dataset': dataset})
+    assert digest == file_hash(dataset) and not cached
+    path = cache_path(dataset, digest=digest)
+    pd.testing.assert_frame_equal(read_table(path), clean_frame(read_table(dataset)))
+    assert load_dataset({'dataset': dataset}) == (digest, True)
+
+def test_workers_reuse_the_hash_from_the_load_stage(dataset, tmp_path, monkeypatch):
+    job = make_jobs([dataset], str(tmp_path / 'reports'))[0]
+    job['source_hash'], _ = load_dataset(job)
+
+    def rehash(path):
+        raise AssertionError(f"{path} hashed again")
+    monkeypatch.setattr(data_analysis, 'file_hash', rehash)
+    monkeypatch.setattr(cleaning, 'file_hash', rehash)
+    assert analyze_dataset(job) == 2_000
+    with open(os.path.join(job['output_dir'], 'analysis.txt')) as f:
+        assert 'Cleaned dataset loaded from cache' in f.read()
+    render_dataset(dict(job, charts=['bar_chart']))
+    assert os.listdir(os.path.join(job['output_dir'], 'charts'))
+
+def test_same_dataset_staged_from_two_threads(dataset):
+    with ThreadPoolExecutor(2) as pool:
+        results = list(pool.map(load_dataset, [{'dataset': dataset}] * 2))
+    assert results[0][0] == results[1][0]
+    assert os.listdir(os.path.dirname(cache_path(dataset))) == [os.path.basename(cache_path(dataset))]
@@ -0,0 +1,44 @@
+"""
+Regression tests for the cleaning stage
+"""
+
+import numpy as np
+import pandas as pd
+from cleaning import clean_frame, parse_dates
+from create_sample_data import REFERENCE_DATE, generate_netflix_chunk
+from data_analysis import DataAnalyzer
+from incremental import AggregateState
+from storage import read_table, to_columnar, write_table
+
+def sample_frame(n_rows, start=0, seed=0):
+    return generate_netflix_chunk(np.random.default_rng(seed), start, n_rows, REFERENCE_DATE)
+
+def test_parse_dates_all_missing():
+    parsed = parse_dates(pd.Series([np.nan, np.nan]))
+    assert pd.api.types.is_datetime64_any_dtype(parsed)
+    assert parsed.isna().all()
+
+def test_clean_frame_chunk_without_dates(tmp_path):
+    path = tmp_path / 'titles.csv'
+    write_table(sample_frame(5).assign(date_added=None), str(path))
+    raw = read_table(str(path))
+    assert raw['date_added'].dtype == 'float64'
+
+    cleaned = clean_frame(raw)
+    assert cleaned['date_added'].isna().all()
+    assert cleaned['year_added'].isna().all()
+    assert to_columnar(raw)['date_added'].isna().all()
+
+def test_incremental_update_appended_row_without_date(tmp_path):
+    path = tmp_path / 'titles.csv'
+    state_path = tmp_path / 'state.json'
+    write_table(sample_frame(20), str(path))
+    analyzer = DataAnalyzer(str(path), output_dir=str(tmp_path / 'out'))
+    analyzer.incremental_update(str(state_path))
+
+    appended = sample_frame(1, start=20, seed=1).assign(date_added=None)
+    appended.to_csv(path, mode='a', header=False, index=False)
+    aggregates = analyzer.incremental_update(str(state_path))
+
+    assert AggregateState.load(str(state_path)).rows_seen == 21
+    assert aggregates['type_counts'].sum() == 21
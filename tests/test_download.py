@@ -0,0 +1,142 @@
+"""
+Resumable download against a local HTTP server
+"""
+
+import hashlib
+import http.server
+import json
+import os
+import subprocess
+import sys
+import threading
+import pytest
+import requests
+from download import fetch, manifest_path, verify
+
+DATA = bytes(range(256)) * 400
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """Serves DATA with an ETag, Range/If-Range resumes and If-None-Match revalidation"""
+
+    etag = '"' + hashlib.md5(DATA).hexdigest() + '"'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = 0
+        if self.headers.get('Range') and self.headers.get('If-Range') == self.etag:
+            start = int(self.headers['Range'].split('=')[1].rstrip('-'))
+            if start >= len(DATA):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(DATA)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            # range_shift simulates a server that answers with a different range
+            start = max(0, start - self.server.range_shift)
+            self.send_header('Content-Range', f"bytes {start}-{len(DATA) - 1}/{len(DATA)}")
+        else:
+            self.send_response(200)
+        body = DATA[start:]
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', self.etag)
+        self.end_headers()
+        if self.server.cut:
+            # Drop the connection part-way through the body, once
+            self.wfile.write(body[:self.server.cut])
+            self.wfile.flush()
+            self.server.cut = 0
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.requests = []
+    httpd.cut = 0
+    httpd.range_shift = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/netflix_titles.csv"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_interrupted_download_resumes_with_range(server, tmp_path):
+    path = str(tmp_path / 'netflix_titles.csv')
+    server.cut = 30_000
+    with pytest.raises(requests.RequestException):
+        fetch(server.url, path, chunk_size=1024)
+    partial = os.path.getsize(path + '.part')
+    assert 0 < partial < len(DATA)
+    assert not os.path.exists(path)
+
+    assert fetch(server.url, path, chunk_size=1024) == 'resumed'
+    assert server.requests[-1]['Range'] == f"bytes={partial}-"
+    assert server.requests[-1]['If-Range'] == Handler.etag
+    assert read(path) == DATA
+    assert verify(path)
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(path), os.path.basename(manifest_path(path))])
+
+def test_unchanged_source_is_revalidated(server, tmp_path):
+    path = str(tmp_path / 'netflix_titles.csv')
+    assert fetch(server.url, path) == 'downloaded'
+    assert fetch(server.url, path) == 'unchanged'
+    assert server.requests[-1]['If-None-Match'] == Handler.etag
+    assert read(path) == DATA
+
+def test_corrupt_file_is_downloaded_again(server, tmp_path):
+    path = str(tmp_path / 'netflix_titles.csv')
+    fetch(server.url, path)
+    with open(path, 'r+b') as f:
+        f.write(b'corrupt')
+    assert not verify(path)
+
+    assert fetch(server.url, path) == 'downloaded'
+    assert 'If-None-Match' not in server.requests[-1]
+    assert read(path) == DATA
+
+def test_unsatisfiable_range_discards_part(server, tmp_path):
+    path = str(tmp_path / 'netflix_titles.csv')
+    with open(path + '.part', 'wb') as f:
+        f.write(DATA + b'stale')
+    with open(path + '.part.json', 'w') as f:
+        json.dump({'url': server.url, 'etag': Handler.etag, 'last_modified': None}, f)
+
+    with pytest.raises(ValueError):
+        fetch(server.url, path)
+    assert not os.path.exists(path + '.part')
+
+    assert fetch(server.url, path) == 'downloaded'
+    assert read(path) == DATA
+
+def test_mismatched_content_range_restarts(server, tmp_path):
+    path = str(tmp_path / 'netflix_titles.csv')
+    server.cut = 30_000
+    with pytest.raises(requests.RequestException):
+        fetch(server.url, path, chunk_size=1024)
+
+    server.range_shift = 1000
+    assert fetch(server.url, path, chunk_size=1024) == 'downloaded'
+    assert 'Range' in server.requests[-2]
+    assert 'Range' not in server.requests[-1]
+    assert read(path) == DATA
+    assert verify(path)
+
+def test_download_does_not_import_pandas():
+    code = "import sys, download; print('pandas' in sys.modules or 'pyarrow' in sys.modules)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == 'False'
@@ -0,0 +1,28 @@
+"""
+Atomic writes leave either the old file or the complete new one
+"""
+
+import os
+import pytest
+from fileutil import atomic_write, file_hash
+
+def test_atomic_write_replaces_file(tmp_path):
+    path = str(tmp_path / 'state' / 'state.json')
+    with atomic_write(path) as f:
+        f.write('new')
+        assert not os.path.exists(path)
+    with open(path) as f:
+        assert f.read() == 'new'
+    assert os.listdir(tmp_path / 'state') == ['state.json']
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = str(tmp_path / 'state.json')
+    with atomic_write(path) as f:
+        f.write('old')
+    digest = file_hash(path)
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write('partial')
+            raise RuntimeError("interrupted")
+    assert file_hash(path) == digest
+    assert os.listdir(tmp_path) == ['state.json']
@@ -0,0 +1,30 @@
+"""
+Incremental updates must count every appended row
+"""
+
+import numpy as np
+import pandas as pd
+from create_sample_data import REFERENCE_DATE, generate_netflix_chunk
+from data_analysis import DataAnalyzer
+from incremental import AggregateState, _show_number
+from storage import write_table
+
+def test_appended_rows_with_low_or_unusual_ids_are_counted(tmp_path):
+    path = tmp_path / 'titles.csv'
+    state_path = str(tmp_path / 'state.json')
+    write_table(generate_netflix_chunk(np.random.default_rng(0), 0, 20, REFERENCE_DATE), str(path))
+    analyzer = DataAnalyzer(str(path), output_dir=str(tmp_path / 'out'))
+    analyzer.incremental_update(state_path)
+
+    appended = generate_netflix_chunk(np.random.default_rng(1), 0, 3, REFERENCE_DATE)
+    appended['show_id'] = ['s5', 'tt0001', 'x-1']
+    appended.to_csv(path, mode='a', header=False, index=False)
+    aggregates = analyzer.incremental_update(state_path)
+
+    assert AggregateState.load(state_path).rows_seen == 23
+    assert aggregates['type_counts'].sum() == 23
+
+def test_show_number_follows_show_id_pattern():
+    numbers = _show_number(pd.Series(['s12', 'tt0042', 'x-1', None]))
+    assert numbers.iloc[:2].tolist() == [12, 42]
+    assert numbers.iloc[2:].isna().all()
@@ -0,0 +1,32 @@
+"""
+Lazy text loading must not change the exported rows
+"""
+
+import contextlib
+import io
+import os
+import pandas as pd
+import pytest
+from create_sample_data import create_large_netflix_data
+from data_analysis import DataAnalyzer
+
+EXPORTS = ['recent_movies.csv', 'multi_season_shows.csv', 'us_content.csv']
+
+def export(path, output_dir, **options):
+    analyzer = DataAnalyzer(path, output_dir=output_dir, **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer.load_data()
+        analyzer.data_cleaning()
+        analyzer.save_processed_data()
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_lazy_text_exports_match_eager(tmp_path, compact):
+    path = str(tmp_path / 'titles.csv')
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_large_netflix_data(2000, seed=4, output_path=path)
+    export(path, str(tmp_path / 'lazy'), lazy_text=True, compact=compact)
+    export(path, str(tmp_path / 'eager'), compact=compact)
+
+    for name in EXPORTS:
+        pd.testing.assert_frame_equal(pd.read_csv(os.path.join(tmp_path, 'lazy', name)),
+                                      pd.read_csv(os.path.join(tmp_path, 'eager', name)))
@@ -0,0 +1,36 @@
+"""
+The process-pool groupby engine must match the serial query plan
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from cleaning import clean_frame
+from create_sample_data import REFERENCE_DATE, generate_netflix_chunk
+from data_analysis import ANALYSIS_PLAN
+from parallel import ParallelGroupBy
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(7)
+    df = generate_netflix_chunk(rng, 0, 20_000, REFERENCE_DATE)
+    df['release_year'] = df['release_year'].astype('float64')
+    df.loc[rng.random(len(df)) < 0.05, 'release_year'] = np.nan
+    df.loc[rng.random(len(df)) < 0.05, 'date_added'] = None
+    return clean_frame(df)
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_parallel_plan_matches_serial(frame, workers):
+    engine = ParallelGroupBy(workers, min_partition_rows=1_000)
+    assert len(engine.partitions(len(frame))) - 1 == workers
+    try:
+        serial = ANALYSIS_PLAN.execute(frame)
+        parallel = ANALYSIS_PLAN.execute(frame, None, engine)
+    finally:
+        engine.close()
+
+    for keys in ANALYSIS_PLAN.counts:
+        pd.testing.assert_series_equal(parallel.count(keys), serial.count(keys))
+    for keys, column in ANALYSIS_PLAN.means:
+        pd.testing.assert_series_equal(parallel.mean(keys, column), serial.mean(keys, column),
+                                       rtol=1e-12)
@@ -0,0 +1,112 @@
+"""
+Approximate aggregates stay within their error bounds, merge across
+partitions and survive serialization
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sketches import ApproximateAggregates, HyperLogLog, SpaceSaving, TDigest
+
+def round_trip(sketch):
+    return type(sketch).from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+def test_hyperloglog_merged_partitions():
+    rng = np.random.default_rng(0)
+    values = np.array([f"name {i}" for i in range(200_000)], dtype=object)
+    # Random overlapping partitions that together cover every value
+    partitions = np.array_split(rng.permutation(values), 4)
+    partitions = [np.concatenate([part, rng.choice(values, 20_000)]) for part in partitions]
+    merged = HyperLogLog()
+    for part in partitions:
+        merged.merge(HyperLogLog().update(part))
+
+    whole = HyperLogLog().update(np.concatenate(partitions))
+    np.testing.assert_array_equal(merged.registers, whole.registers)
+    standard_error = 1.04 / np.sqrt(len(merged.registers))
+    assert abs(merged.estimate() / len(values) - 1) < 3 * standard_error
+
+def test_hyperloglog_small_cardinality_is_near_exact():
+    sketch = HyperLogLog().update(np.array(['a', 'b', 'c', 'a'], dtype=object))
+    assert round(sketch.estimate()) == 3
+
+def test_tdigest_quantiles_match_numpy():
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.normal(2000, 15, 150_000), rng.exponential(5, 50_000) + 1950])
+    merged = TDigest()
+    for part in np.array_split(rng.permutation(values), 7):
+        merged.merge(TDigest().update(part))
+
+    assert merged.count() == len(values)
+    assert (merged.min, merged.max) == (values.min(), values.max())
+    ordered = np.sort(values)
+    for q in [0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999]:
+        estimate = merged.quantile(q)
+        rank = np.searchsorted(ordered, estimate) / len(ordered)
+        assert abs(rank - q) < 0.01, (q, estimate, np.quantile(values, q))
+
+def test_space_saving_top_k_on_skewed_data():
+    rng = np.random.default_rng(2)
+    items = rng.zipf(1.3, 300_000)
+    items = items[items < 5_000].astype(str)
+    exact = pd.Series(items).value_counts()
+
+    sketch = SpaceSaving(capacity=50)
+    for chunk in np.array_split(items, 30):
+        sketch.update(chunk)
+    top = sketch.top(10)
+
+    assert sketch.total == len(items)
+    assert list(top.index) == list(exact.index[:10])
+    true_counts = exact.reindex(top.index)
+    assert (top['count'] >= true_counts).all()
+    assert (top['count'] - top['error'] <= true_counts).all()
+    # The heaviest items are far apart, so their membership is certain
+    assert top['guaranteed'].iloc[:5].all()
+    guaranteed = top.index[top['guaranteed']]
+    assert set(guaranteed) <= set(exact.index[:10])
+
+def test_space_saving_flags_uncertain_ties():
+    sketch = SpaceSaving(capacity=2)
+    # Each chunk drops its third item, so b and c end up with the same upper bound
+    for chunk in [['a'] * 5 + ['b'] * 3 + ['c'], ['a'] * 5 + ['c'] * 3 + ['d']]:
+        sketch.update(chunk)
+    top = sketch.top(2)
+    assert top.loc['a', 'guaranteed']
+    assert not top.iloc[1]['guaranteed']
+
+@pytest.mark.parametrize('sketch', [
+    HyperLogLog(10).update(np.arange(5_000)),
+    SpaceSaving(20).update(np.random.default_rng(3).zipf(1.5, 10_000).astype(str)),
+    TDigest(50).update(np.random.default_rng(4).normal(size=10_000)),
+], ids=['hyperloglog', 'space_saving', 'tdigest'])
+def test_to_dict_round_trip(sketch):
+    restored = round_trip(sketch)
+    assert restored.to_dict() == sketch.to_dict()
+    if isinstance(sketch, HyperLogLog):
+        assert restored.estimate() == sketch.estimate()
+    elif isinstance(sketch, SpaceSaving):
+        pd.testing.assert_frame_equal(restored.top(5), sketch.top(5))
+    else:
+        assert [restored.quantile(q) for q in (0.1, 0.5, 0.9)] == [sketch.quantile(q) for q in (0.1, 0.5, 0.9)]
+
+def test_aggregates_save_and_load(tmp_path):
+    chunk = pd.DataFrame({
+        'director': ['A, B', 'Unknown', 'C'],
+        'cast': ['X', 'Y, Z', 'Unknown'],
+        'country': ['US, UK', 'US', 'India'],
+        'type': pd.Categorical(['Movie', 'TV Show', 'Movie']),
+        'release_year': [2001, 2015, 2020],
+    })
+    aggregates = ApproximateAggregates().update(chunk)
+    path = str(tmp_path / 'sketches' / 'sketches.json')
+    aggregates.save(path)
+    assert os.listdir(tmp_path / 'sketches') == ['sketches.json']
+
+    results, loaded = aggregates.results(), ApproximateAggregates.load(path).results()
+    assert results['distinct_director'] == loaded['distinct_director'] == 3
+    assert results['distinct_cast'] == loaded['distinct_cast'] == 3
+    pd.testing.assert_frame_equal(loaded['top_country'], results['top_country'])
+    pd.testing.assert_frame_equal(loaded['release_year_quantiles'], results['release_year_quantiles'])
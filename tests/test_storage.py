@@ -0,0 +1,23 @@
+"""
+Chunked writes must round-trip through every storage format
+"""
+
+import pandas as pd
+import pytest
+from storage import TableWriter, iter_table, read_table
+
+@pytest.mark.parametrize('filename', ['titles.csv', 'titles.parquet', 'titles.feather'])
+def test_chunks_with_different_categories(tmp_path, filename):
+    path = str(tmp_path / filename)
+    chunks = [pd.DataFrame({'type': ['Movie'], 'rating': ['R']}),
+              pd.DataFrame({'type': ['TV Show'], 'rating': ['G']}),
+              pd.DataFrame({'type': ['Movie'], 'rating': ['PG']})]
+    with TableWriter(path) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+
+    expected = pd.concat(chunks, ignore_index=True)
+    table = read_table(path)
+    assert table.astype(str).equals(expected)
+    streamed = pd.concat(iter_table(path, 1), ignore_index=True)
+    assert streamed.astype(str).equals(expected)
@@ -0,0 +1,29 @@
+"""
+Streaming mode must reproduce the in-memory results exactly
+"""
+
+import contextlib
+import io
+import pandas as pd
+import pytest
+from create_sample_data import create_large_netflix_data
+from data_analysis import DataAnalyzer
+
+@pytest.mark.parametrize('filename', ['titles.csv', 'titles.parquet', 'titles.feather'])
+def test_streaming_matches_in_memory(tmp_path, filename):
+    path = str(tmp_path / filename)
+    analyzer = DataAnalyzer(path, output_dir=str(tmp_path / 'out'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_large_netflix_data(3000, seed=3, chunk_size=1000, output_path=path)
+        analyzer.load_data(use_cache=False)
+        analyzer.data_cleaning()
+        grouped = analyzer.grouping_tasks()
+        aggregated = analyzer.aggregation_tasks()
+        streamed = analyzer.streaming_tasks(chunk_size=400)
+
+    for name, expected in zip(['type_counts', 'rating_counts', 'yearly_content', 'country_counts'], grouped):
+        pd.testing.assert_series_equal(streamed[name], expected)
+    avg_year_by_type, yearly_additions, rating_by_type = aggregated
+    pd.testing.assert_series_equal(streamed['avg_year_by_type'], avg_year_by_type)
+    pd.testing.assert_series_equal(streamed['yearly_additions'], yearly_additions)
+    pd.testing.assert_frame_equal(streamed['rating_by_type'], rating_by_type)
@@ -0,0 +1,31 @@
+"""
+Persisted token index must survive interrupted writes
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from cleaning import clean_frame
+from create_sample_data import REFERENCE_DATE, generate_netflix_chunk
+from token_index import TokenIndex, index_path, load_or_build
+
+def cleaned_frame(n_rows=200):
+    return clean_frame(generate_netflix_chunk(np.random.default_rng(0), 0, n_rows, REFERENCE_DATE))
+
+def test_save_leaves_no_temporary_files(tmp_path):
+    dataset = str(tmp_path / 'titles.csv')
+    load_or_build(dataset, cleaned_frame(), 'abc')
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(index_path(dataset))]
+
+def test_truncated_index_is_rebuilt(tmp_path):
+    dataset = str(tmp_path / 'titles.csv')
+    df = cleaned_frame()
+    expected = load_or_build(dataset, df, 'abc').counts('country')
+
+    path = index_path(dataset)
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) // 2)
+
+    index = load_or_build(dataset, df, 'abc')
+    pd.testing.assert_series_equal(index.counts('country'), expected)
+    pd.testing.assert_series_equal(TokenIndex.load(path).counts('country'), expected)
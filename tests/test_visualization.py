@@ -0,0 +1,27 @@
+"""
+Binned chart statistics must match matplotlib's raw-value results
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib import cbook
+from data_visualization import box_stats
+
+@pytest.mark.parametrize('seed', range(5))
+def test_box_stats_match_matplotlib(seed):
+    rng = np.random.default_rng(seed)
+    values = np.concatenate([rng.integers(1990, 2025, rng.integers(5, 400)),
+                             rng.integers(1925, 1950, rng.integers(0, 5))])
+    expected = cbook.boxplot_stats(values.astype(float))[0]
+    stats = box_stats(pd.Series(values).value_counts().sort_index(), 'Movie')
+
+    for key in ['q1', 'med', 'q3', 'whislo', 'whishi', 'mean']:
+        assert stats[key] == pytest.approx(expected[key], rel=1e-12, abs=1e-12), key
+    assert sorted(stats['fliers']) == sorted(set(expected['fliers']))
+    assert stats['label'] == 'Movie'
+
+def test_box_stats_single_value():
+    stats = box_stats(pd.Series([3], index=[2020]), 'TV Show')
+    assert (stats['q1'], stats['med'], stats['q3']) == (2020, 2020, 2020)
+    assert len(stats['fliers']) == 0
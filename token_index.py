@@ -0,0 +1,138 @@
+"""
+Inverted index over the multi-valued dataset columns
+Splits comma-joined values such as "United States, Canada" once into
+token -> row-id postings so membership filters and per-token counts need
+no repeated string scanning
+"""
+
+import logging
+import os
+import zipfile
+import numpy as np
+import pandas as pd
+from fileutil import atomic_write
+
+logger = logging.getLogger(__name__)
+
+INDEXED_COLUMNS = ['country', 'cast', 'listed_in', 'director']
+
+INDEX_SUFFIX = '.index.npz'
+
+def split_tokens(series):
+    """Split comma-joined values into stripped tokens
+
+    Returns a Series of tokens indexed by the row position each came from;
+    missing values and empty tokens produce no entries.
+    """
+    values = pd.Series(series.to_numpy(), index=np.arange(len(series)), dtype=object).dropna()
+    tokens = values.astype(str).str.split(',').explode().str.strip()
+    return tokens[tokens != '']
+
+def token_mask(series, token):
+    """Boolean mask of rows whose comma-joined value contains ``token`` exactly"""
+    tokens = split_tokens(series)
+    mask = np.zeros(len(series), dtype=bool)
+    mask[tokens.index[tokens.to_numpy() == token].to_numpy()] = True
+    return pd.Series(mask, index=series.index)
+
+def token_counts(series):
+    """Number of rows containing each token, sorted by token"""
+    counts = split_tokens(series).value_counts().sort_index()
+    return counts.rename_axis(series.name).rename(None).astype('int64')
+
+def index_path(dataset_path):
+    """Return the index file stored next to a dataset"""
+    return dataset_path + INDEX_SUFFIX
+
+class TokenIndex:
+    """Token -> row-id postings for several columns
+
+    Each column is stored as sorted unique tokens, an offsets array and a
+    single int32 array of row ids, so the postings of ``tokens[i]`` are
+    ``row_ids[offsets[i]:offsets[i + 1]]``.
+    """
+
+    def __init__(self, n_rows, postings, source_hash=None):
+        self.n_rows = n_rows
+        self.postings = postings
+        self.source_hash = source_hash
+
+    @classmethod
+    def build(cls, df, columns=INDEXED_COLUMNS, source_hash=None):
+        """Build postings for every indexed column present in ``df``"""
+        postings = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+            tokens = split_tokens(df[col])
+            codes, uniques = pd.factorize(tokens.to_numpy(), sort=True)
+            order = np.argsort(codes, kind='stable')
+            row_ids = tokens.index.to_numpy()[order].astype(np.int32)
+            offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codes, minlength=len(uniques)), out=offsets[1:])
+            postings[col] = (np.asarray(uniques, dtype=object), offsets, row_ids)
+        return cls(len(df), postings, source_hash)
+
+    def _lookup(self, column, token):
+        tokens, offsets, row_ids = self.postings[column]
+        i = np.searchsorted(tokens, token)
+        if i < len(tokens) and tokens[i] == token:
+            return row_ids[offsets[i]:offsets[i + 1]]
+        return row_ids[:0]
+
+    def rows(self, column, token):
+        """Return the row positions whose ``column`` contains ``token``"""
+        return self._lookup(column, token)
+
+    def mask(self, column, token, index=None):
+        """Boolean mask of rows whose ``column`` contains ``token``"""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self._lookup(column, token)] = True
+        return pd.Series(mask, index=index)
+
+    def counts(self, column):
+        """Number of rows containing each token, sorted by token"""
+        tokens, offsets, _ = self.postings[column]
+        return pd.Series(np.diff(offsets), index=pd.Index(tokens, name=column), dtype='int64')
+
+    def save(self, path):
+        """Write the index as an uncompressed ``.npz`` archive
+
+        An interrupted or concurrent run never leaves a truncated index behind.
+        """
+        arrays = {'n_rows': np.array(self.n_rows), 'source_hash': np.array(self.source_hash or '')}
+        for col, (tokens, offsets, row_ids) in self.postings.items():
+            arrays[f"{col}.tokens"] = tokens.astype(str)
+            arrays[f"{col}.offsets"] = offsets
+            arrays[f"{col}.row_ids"] = row_ids
+        with atomic_write(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by ``save``"""
+        with np.load(path) as data:
+            columns = {name.split('.')[0] for name in data.files if name.endswith('.tokens')}
+            postings = {col: (data[f"{col}.tokens"].astype(object), data[f"{col}.offsets"],
+                              data[f"{col}.row_ids"])
+                        for col in columns}
+            return cls(int(data['n_rows']), postings, str(data['source_hash']) or None)
+
+def load_or_build(dataset_path, df, source_hash, columns=INDEXED_COLUMNS):
+    """Load the persisted index for a dataset, rebuilding it when the source changed"""
+    path = index_path(dataset_path)
+    index = None
+    if os.path.exists(path):
+        try:
+            index = TokenIndex.load(path)
+        except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            # An unreadable index is a cache miss; the rebuild below replaces it
+            logger.warning("Rebuilding unreadable token index %s: %s", path, e)
+    if index is not None and index.source_hash == source_hash and index.n_rows == len(df) \
+            and all(col in index.postings for col in columns if col in df.columns):
+        return index
+    index = TokenIndex.build(df, columns, source_hash)
+    # A projected frame would persist an incomplete index
+    if all(col in df.columns for col in columns):
+        index.save(path)
+    return index